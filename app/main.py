@@ -1,6 +1,7 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers.query_router import router as query_router
+from app.utils.logger import make_request_id, request_id_var
 
 app = FastAPI(
     title="AI Research Assistant",
@@ -17,6 +18,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Tag every request with an id that is attached to its log lines
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    request_id = make_request_id(request.headers.get("X-Request-ID"))
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 # Include routes
 app.include_router(query_router, prefix="/api")
 
@@ -1,8 +1,16 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
+
+ResearchMode = Literal["fast", "standard", "deep"]
 
 class QueryRequest(BaseModel):
     query: str = Field(..., example="Compare the latest electric vehicle models and their safety features.")
+    mode: ResearchMode = Field("standard", description="Research depth: fast, standard or deep")
+    fields: Optional[List[str]] = Field(
+        None,
+        description="Response fields to return, as dotted paths (e.g. answer, sources, thought_process.sub_questions). Defaults to all fields.",
+        example=["answer", "sources", "thought_process.sub_questions"]
+    )
 
 class Source(BaseModel):
     title: str
@@ -17,4 +25,22 @@ class ThoughtProcess(BaseModel):
 class QueryResponse(BaseModel):
     thought_process: ThoughtProcess
     answer: str
-    sources: List[Source] 
\ No newline at end of file
+    sources: List[Source] 
+class BatchQueryRequest(BaseModel):
+    queries: List[str] = Field(..., example=[
+        "What are the environmental impacts of electric vehicles?",
+        "How do electric vehicle batteries get recycled?"
+    ])
+    mode: ResearchMode = Field("standard", description="Research depth applied to every query in the batch")
+    fields: Optional[List[str]] = Field(
+        None,
+        description="Fields of each query's response to return, as dotted paths. Defaults to all fields."
+    )
+
+class BatchQueryResult(BaseModel):
+    query: str
+    response: Optional[QueryResponse] = None
+    error: Optional[str] = None
+
+class BatchQueryResponse(BaseModel):
+    results: List[BatchQueryResult]
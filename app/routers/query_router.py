@@ -1,28 +1,91 @@
-from fastapi import APIRouter, HTTPException
-from app.models.schemas import QueryRequest, QueryResponse
+from fastapi import APIRouter, HTTPException, Request
+from app.models.schemas import QueryRequest, QueryResponse, BatchQueryRequest, BatchQueryResponse
 from app.services.agent import ResearchAgent
+from app.services.admission import AdmissionController, AdmissionRejected
+from app.services.profiles import PROFILES, QUEUE_BUDGET_SHARE
 from app.utils.logger import logger
+from app.utils.responses import batch_include, build_include, lean_json_response
 
 router = APIRouter(tags=["Query"])
 agent = ResearchAgent()
-
-@router.post("/ask", response_model=QueryResponse)
-async def ask_agent(request: QueryRequest):
+# A request may queue for part of its mode's latency budget before being shed
+admission = AdmissionController(
+    estimate=agent.stage_latencies.estimate,
+    queue_timeouts={name: profile.latency_budget * QUEUE_BUDGET_SHARE for name, profile in PROFILES.items()}
+)
+
+def _shed(e: AdmissionRejected) -> HTTPException:
+    logger.warning("Request shed (%s): %s", e.status_code, e.detail)
+    return HTTPException(status_code=e.status_code, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+
+PARTIAL_RESPONSE_NOTE = (
+    "When `fields` is set, only the listed fields are returned, so the response is a subset "
+    "of the schema below and unlisted fields are absent."
+)
+
+@router.post("/ask", response_model=QueryResponse,
+             description=f"Research a query and answer it with sources. {PARTIAL_RESPONSE_NOTE}")
+async def ask_agent(request: QueryRequest, http_request: Request):
     try:
-        logger.info(f"Received query: {request.query}")
-        result = await agent.handle(request.query)
-        return result
+        logger.info("Received query: %s", request.query)
+        include = build_include(request.fields, QueryResponse)
+        async with admission.slot(request.mode):
+            result = await agent.handle(request.query, mode=request.mode)
+        return lean_json_response(result, http_request, include=include)
+    except AdmissionRejected as e:
+        raise _shed(e)
     except ValueError as e:
-        logger.warning(f"Validation error: {str(e)}")
+        logger.warning("Validation error: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Error processing query: {str(e)}")
+        logger.error("Error processing query: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error") 
+
+@router.post("/ask-batch", response_model=BatchQueryResponse,
+             description=f"Research a list of queries together, sharing identical work. {PARTIAL_RESPONSE_NOTE}")
+async def ask_agent_batch(request: BatchQueryRequest, http_request: Request):
+    try:
+        logger.info("Received batch of %s queries", len(request.queries))
+        include = batch_include(build_include(request.fields, QueryResponse))
+        # The batch is admitted as one unit; its stage limits throttle its queries
+        async with admission.batch_slot(request.mode):
+            results = await agent.handle_batch(request.queries, mode=request.mode)
+        return lean_json_response(BatchQueryResponse(results=results), http_request, include=include)
+    except AdmissionRejected as e:
+        raise _shed(e)
+    except ValueError as e:
+        logger.warning("Validation error: %s", e)
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error("Error processing batch: %s", e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/metrics/admission")
+async def admission_metrics():
+    return admission.stats()
+
+@router.get("/metrics/cache")
+async def cache_metrics():
+    caches = {
+        "search": agent.searcher.cache,
+        "page": agent.parser.cache,
+        "moderation": agent.safety.cache,
+        "response": agent.response_cache
+    }
+    return {name: cache.stats() for name, cache in caches.items() if cache}
+
+@router.get("/metrics/models")
+async def model_metrics():
+    return {"models": agent.router.stats()}
+
+@router.get("/metrics/domains")
+async def domain_metrics(limit: int = 20):
+    return {"domains": agent.parser.health.worst(limit)}
     
 @router.post("/ask-test", response_model=QueryResponse)
 async def ask_agent_test(request: QueryRequest):
     try:
-        logger.info(f"Received test query: {request.query}")
+        logger.info("Received test query: %s", request.query)
         # Hardcoded response matching the specified output
         result = QueryResponse(
             thought_process={
@@ -170,8 +233,8 @@ Quantum computing, while still in its infancy, holds great promise for solving c
         )
         return result
     except ValueError as e:
-        logger.warning(f"Validation error: {str(e)}")
+        logger.warning("Validation error: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Error processing test query: {str(e)}")
+        logger.error("Error processing test query: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
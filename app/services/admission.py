@@ -0,0 +1,165 @@
+import asyncio
+import heapq
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+
+
+class StageLatencies:
+    """Rolling latencies of the research pipeline stages, per research mode"""
+
+    def __init__(self, window: int = 50, default_estimate: float = 30.0,
+                 mode_defaults: Optional[Dict[str, float]] = None):
+        self.window = window
+        self.default_estimate = default_estimate  # Used until any stage has been recorded
+        self.mode_defaults = mode_defaults or {}  # Per-mode estimates used until that mode has samples
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, mode: str, stage: str, seconds: float) -> None:
+        with self._lock:
+            key = (mode, stage)
+            if key not in self._samples:
+                self._samples[key] = deque(maxlen=self.window)
+            self._samples[key].append(seconds)
+
+    def estimate(self, mode: Optional[str] = None) -> float:
+        """Expected time to serve one request: the sum of each stage's recent mean latency"""
+        with self._lock:
+            means = [
+                sum(samples) / len(samples)
+                for (sample_mode, _), samples in self._samples.items()
+                if samples and (mode is None or sample_mode == mode)
+            ]
+        if not means:
+            if mode in self.mode_defaults:
+                return self.mode_defaults[mode]
+            return self.default_estimate if mode is None else self.estimate()
+        return sum(means)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of being queued"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class AdmissionController:
+    """Caps in-flight research and keeps a bounded wait queue in front of it.
+
+    Requests beyond `max_in_flight` wait for a slot for up to their mode's queue
+    timeout (`queue_timeouts`, else `queue_timeout`). A request is rejected
+    straight away, with a Retry-After hint, when the queue is full (429) or when
+    its estimated wait would exceed that timeout (503). The wait is estimated from
+    how long each in-flight request has already run against its mode's expected
+    latency, plus the expected latency of every request queued ahead of it.
+
+    A batch is admitted as one unit through `batch_slot`: it holds a single slot,
+    at most `max_batches` run at once, and its own stage limits throttle its queries.
+    """
+
+    def __init__(self, estimate: Callable[[Optional[str]], float], max_in_flight: int = 8,
+                 max_queue: int = 32, queue_timeout: float = 30.0, max_batches: int = 2,
+                 queue_timeouts: Optional[Dict[str, float]] = None, clock: Callable[[], float] = time.monotonic):
+        self.estimate = estimate
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.queue_timeouts = queue_timeouts or {}
+        self.max_batches = max_batches
+        self.batches = 0
+        self.clock = clock
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._running: List[Tuple[Optional[str], float]] = []  # (mode, started at) per held slot
+        self._queued: List[Optional[str]] = []  # Modes of requests waiting for a slot, oldest first
+        self.rejected = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._running)
+
+    @property
+    def waiting(self) -> int:
+        return len(self._queued)
+
+    def timeout_for(self, mode: Optional[str] = None) -> float:
+        """How long a request of this mode may wait for a slot"""
+        return self.queue_timeouts.get(mode, self.queue_timeout)
+
+    def estimated_wait(self, mode: Optional[str] = None) -> float:
+        """Seconds a newly queued request is expected to wait for a slot"""
+        if self.in_flight < self.max_in_flight and self.waiting == 0:
+            return 0.0
+        # When each slot is expected to free up: in-flight requests have their
+        # elapsed time deducted, and requests queued ahead take slots in order
+        now = self.clock()
+        free_at = [max(0.0, self.estimate(running_mode) - (now - started)) for running_mode, started in self._running]
+        free_at.extend(0.0 for _ in range(self.max_in_flight - len(free_at)))
+        heapq.heapify(free_at)
+        for queued_mode in self._queued:
+            heapq.heappush(free_at, heapq.heappop(free_at) + self.estimate(queued_mode))
+        return free_at[0]
+
+    def _reject(self, status_code: int, detail: str, retry_after: float) -> AdmissionRejected:
+        self.rejected += 1
+        return AdmissionRejected(status_code, detail, retry_after)
+
+    @asynccontextmanager
+    async def slot(self, mode: Optional[str] = None) -> AsyncIterator[None]:
+        """Hold an in-flight research slot for the duration of the block"""
+        wait = self.estimated_wait(mode)
+        timeout = self.timeout_for(mode)
+        if self.waiting >= self.max_queue:
+            raise self._reject(429, "Too many research requests are queued. Please retry later.", wait)
+        if wait > timeout:
+            raise self._reject(503, "The service is currently overloaded. Please retry later.", wait)
+
+        if not self._semaphore.locked() and self.waiting == 0:
+            # A slot is free: acquire returns without suspending
+            await self._semaphore.acquire()
+        else:
+            self._queued.append(mode)
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=timeout)
+            except asyncio.TimeoutError:
+                raise self._reject(503, "Timed out waiting for a research slot. Please retry later.",
+                                   self.estimated_wait(mode))
+            finally:
+                self._queued.remove(mode)
+
+        entry = (mode, self.clock())
+        self._running.append(entry)
+        try:
+            yield
+        finally:
+            self._running.remove(entry)
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def batch_slot(self, mode: Optional[str] = None) -> AsyncIterator[None]:
+        """Hold one in-flight slot for a whole batch, rejecting it when too many batches run"""
+        if self.batches >= self.max_batches:
+            raise self._reject(429, "Too many research batches are running. Please retry later.",
+                               self.estimated_wait(mode))
+        self.batches += 1
+        try:
+            async with self.slot(mode):
+                yield
+        finally:
+            self.batches -= 1
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "batches": self.batches,
+            "rejected": self.rejected,
+            "estimated_wait": round(self.estimated_wait(), 2)
+        }
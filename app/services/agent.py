@@ -2,9 +2,16 @@ from app.services.web_search import WebSearch
 from app.services.content_parser import ContentParser
 from app.services.summarizer import Summarizer
 from app.services.safety import Safety
-from app.models.schemas import Source, QueryResponse, ThoughtProcess
-from app.utils.logger import logger
-from typing import List, Dict, Any, Optional
+from app.services.batch import BatchContext
+from app.services.corpus import ResearchCorpus
+from app.services.profiles import PROFILES, RESEARCH_BUDGET_SHARE, get_profile
+from app.services.admission import StageLatencies
+from app.services.cache import Cache, create_cache_backend
+from app.models.schemas import Source, QueryResponse, ThoughtProcess, BatchQueryResult
+from app.utils.logger import logger, SAMPLED, request_id_var
+from typing import List, Dict, Any, Optional, Callable, Hashable
+import asyncio
+import json
 import re
 import tiktoken
 import time
@@ -12,16 +19,32 @@ from openai import RateLimitError
 
 class ResearchAgent:
     def __init__(self):
-        self.searcher = WebSearch()
-        self.parser = ContentParser()
+        # One backend shared by all services; each gets its own namespace and TTL
+        cache_backend = create_cache_backend()
+        self.searcher = WebSearch(cache=Cache(cache_backend, "search", ttl=6 * 3600))
+        self.parser = ContentParser(cache=Cache(cache_backend, "page", ttl=24 * 3600))
         self.summarizer = Summarizer()
-        self.safety = Safety()
+        self.router = self.summarizer.router
+        self.safety = Safety(cache=Cache(cache_backend, "moderation", ttl=7 * 24 * 3600))
+        self.response_cache = Cache(cache_backend, "response", ttl=3600)
+        self.corpus = ResearchCorpus.from_env()  # Local full-text index consulted before web search
+        # Feeds admission control wait estimates; a mode's budget stands in until it has samples
+        self.stage_latencies = StageLatencies(mode_defaults={name: p.latency_budget for name, p in PROFILES.items()})
         self.encoding = tiktoken.encoding_for_model("gpt-4")
         self.max_tokens = 7000  # Leave room for system message and prompt
         self.max_retries = 3
         self.retry_delay = 2  # seconds
         self.max_search_results = 5  # Maximum number of search results per query
-        self.max_total_sources = 6  # Maximum total number of sources to process
+        # Sub-question, source and summary limits come from the research profile (see profiles.py)
+        self.max_batch_size = 500  # Maximum number of queries accepted by handle_batch
+        # Concurrency limits shared by all queries of a batch, per stage
+        self.batch_limits = {
+            "llm": 4,
+            "search": 4,
+            "fetch": 8,
+            "moderation": 8,
+            "corpus": 4
+        }
 
     def _count_tokens(self, text: str) -> int:
         """Count the number of tokens in a text string"""
@@ -34,9 +57,9 @@ class ResearchAgent:
             return content
         return self.encoding.decode(tokens[:max_tokens])
 
-    def _generate_sub_questions(self, query: str) -> List[str]:
+    def _generate_sub_questions(self, query: str, max_questions: int = 3) -> List[str]:
         """Generate sub-questions to break down the main query"""
-        prompt = f"""Break down the following research question into 2-3 specific sub-questions that will help gather comprehensive information. 
+        prompt = f"""Break down the following research question into 2-{max_questions} specific sub-questions that will help gather comprehensive information. 
         Focus on different aspects of the topic. Return only the questions, one per line.
         
         Main question: {query}
@@ -46,27 +69,25 @@ class ResearchAgent:
         try:
             for attempt in range(self.max_retries):
                 try:
-                    response = self.summarizer.client.chat.completions.create(
-                        model="gpt-4",
+                    response = self.router.complete(
+                        "sub_questions",
                         messages=[
                             {"role": "system", "content": "You are a research assistant that breaks down complex questions into specific, focused sub-questions."},
                             {"role": "user", "content": prompt}
-                        ],
-                        temperature=0.7,
-                        max_tokens=200
+                        ]
                     )
                     questions = response.choices[0].message.content.strip().split('\n')
-                    return [q.strip('- ').strip() for q in questions if q.strip()][:3]  # Limit to 3 sub-questions
+                    return [q.strip('- ').strip() for q in questions if q.strip()][:max_questions]
                 except RateLimitError:
                     if attempt < self.max_retries - 1:
                         time.sleep(self.retry_delay * (attempt + 1))
                         continue
                     raise
                 except Exception as e:
-                    logger.error(f"Error generating sub-questions: {str(e)}")
+                    logger.error("Error generating sub-questions: %s", e)
                     return [query]  # Fallback to original query
         except Exception as e:
-            logger.error(f"Failed to generate sub-questions after {self.max_retries} attempts: {str(e)}")
+            logger.error("Failed to generate sub-questions after %s attempts: %s", self.max_retries, e)
             return [query]  # Fallback to original query
 
     def _sanitize_input(self, text: str) -> str:
@@ -94,23 +115,49 @@ class ResearchAgent:
             formatted.append(f"[{i}] {source['title']} ({source['url']})")
         return "\n".join(formatted)
 
-    def _prepare_summary_content(self, all_results: List[Dict[str, Any]], all_sources: List[Dict[str, Any]]) -> tuple[str, str]:
-        """Prepare content for summary while respecting token limits"""
-        # Calculate available tokens for content
-        system_prompt = "You are a helpful research assistant that provides accurate, comprehensive summaries based on the given information."
-        base_prompt = "Based on the following research findings, provide a detailed and thorough answer that:"
-        prompt_requirements = """
+    def _summary_messages(self, clean_query: str, sources_text: str, content_text: str, max_tokens: int) -> List[Dict[str, str]]:
+        """Chat messages asking for the final answer"""
+        summary_prompt = f"""Based on the following research findings, provide a comprehensive and detailed answer to the original question: "{clean_query}"
+
+        Research findings:
+        {sources_text}
+        
+        Content from sources:
+        {content_text}
+        
+        Please provide a well-structured, detailed answer that:
         1. Directly addresses the original question with a comprehensive analysis
         2. Synthesizes information from multiple sources, highlighting key insights
         3. Includes specific citations (e.g., "According to [1]...") for all major points
         4. Provides detailed comparisons and contrasts where relevant
         5. Maintains a professional and objective tone while being thorough
         6. Organizes information in clear sections with proper headings
-        7. Concludes with a summary of key findings and implications"""
+        7. Concludes with a summary of key findings and implications
 
-        # Reserve tokens for system message, base prompt, and requirements
-        reserved_tokens = self._count_tokens(system_prompt + base_prompt + prompt_requirements)
-        available_tokens = self.max_tokens - reserved_tokens
+        Structure your response with clear sections and subsections, using markdown formatting for better readability.
+        Keep the answer under about {int(max_tokens * 0.75)} words."""
+
+        return [
+            {
+                "role": "system",
+                "content": "You are a helpful research assistant that provides detailed, comprehensive summaries based on the given information. Focus on thoroughness and clarity in your responses."
+            },
+            {
+                "role": "user",
+                "content": summary_prompt
+            }
+        ]
+
+    def _prepare_summary_content(self, all_results: List[Dict[str, Any]], all_sources: List[Dict[str, Any]],
+                                 clean_query: str, summary_tokens: int) -> tuple[str, str]:
+        """Prepare content for summary while respecting token limits"""
+        # The prompt and the answer must both fit in the summary model's context window
+        prompt_tokens = min(self.max_tokens, self.router.prompt_budget("summary", summary_tokens))
+
+        # Reserve tokens for the messages around the sources and content
+        template = self._summary_messages(clean_query, "", "", summary_tokens)
+        reserved_tokens = sum(self._count_tokens(message["content"]) for message in template)
+        available_tokens = prompt_tokens - reserved_tokens
 
         # Format sources (this is usually small)
         sources_text = self._format_sources(all_sources)
@@ -119,14 +166,15 @@ class ResearchAgent:
         # Prepare content with token limit
         content_parts = []
         current_tokens = 0
+        separator_tokens = self._count_tokens("\n---\n")
         
         for result in all_results:
             content = f"From {result['question']}:\n{result['content']}"
-            content_tokens = self._count_tokens(content)
+            content_tokens = self._count_tokens(content) + (separator_tokens if content_parts else 0)
             
             if current_tokens + content_tokens > available_tokens:
                 # If adding this content would exceed the limit, truncate it
-                remaining_tokens = available_tokens - current_tokens
+                remaining_tokens = available_tokens - current_tokens - (separator_tokens if content_parts else 0)
                 if remaining_tokens > 100:  # Only add if we have meaningful space
                     truncated_content = self._truncate_content(content, remaining_tokens)
                     content_parts.append(truncated_content)
@@ -137,55 +185,24 @@ class ResearchAgent:
 
         return sources_text, "\n---\n".join(content_parts)
 
-    def _generate_summary(self, clean_query: str, sources_text: str, content_text: str) -> Optional[str]:
+    def _generate_summary(self, clean_query: str, sources_text: str, content_text: str, max_tokens: int = 2500) -> Optional[str]:
         """Generate summary with retry logic"""
-        summary_prompt = f"""Based on the following research findings, provide a comprehensive and detailed answer to the original question: "{clean_query}"
-
-        Research findings:
-        {sources_text}
-        
-        Content from sources:
-        {content_text}
-        
-        Please provide a well-structured, detailed answer that:
-        1. Directly addresses the original question with a comprehensive analysis
-        2. Synthesizes information from multiple sources, highlighting key insights
-        3. Includes specific citations (e.g., "According to [1]...") for all major points
-        4. Provides detailed comparisons and contrasts where relevant
-        5. Maintains a professional and objective tone while being thorough
-        6. Organizes information in clear sections with proper headings
-        7. Concludes with a summary of key findings and implications
-
-        Structure your response with clear sections and subsections, using markdown formatting for better readability."""
+        messages = self._summary_messages(clean_query, sources_text, content_text, max_tokens)
 
         for attempt in range(self.max_retries):
             try:
-                logger.info(f"Attempting to generate summary (attempt {attempt + 1}/{self.max_retries})")
-                response = self.summarizer.client.chat.completions.create(
-                    model="gpt-4",
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are a helpful research assistant that provides detailed, comprehensive summaries based on the given information. Focus on thoroughness and clarity in your responses."
-                        },
-                        {
-                            "role": "user",
-                            "content": summary_prompt
-                        }
-                    ],
-                    temperature=0.7,
-                    max_tokens=2500  # Increased token limit for longer responses
-                )
+                logger.info("Attempting to generate summary (attempt %s/%s)", attempt + 1, self.max_retries)
+                response = self.router.complete("summary", messages=messages, max_tokens=max_tokens)
                 return response.choices[0].message.content
             except RateLimitError:
                 if attempt < self.max_retries - 1:
                     wait_time = self.retry_delay * (attempt + 1)
-                    logger.info(f"Rate limit hit, waiting {wait_time} seconds before retry")
+                    logger.info("Rate limit hit, waiting %s seconds before retry", wait_time, extra=SAMPLED)
                     time.sleep(wait_time)
                     continue
                 raise
             except Exception as e:
-                logger.error(f"Error during summarization: {str(e)}")
+                logger.error("Error during summarization: %s", e)
                 raise
 
         return None
@@ -201,20 +218,62 @@ class ResearchAgent:
             Provide a brief analysis (2-3 sentences) of how this content relates to the question.
             Focus on key insights and relevance."""
             
-            response = self.summarizer.client.chat.completions.create(
-                model="gpt-4",
+            response = self.router.complete(
+                "analysis",
                 messages=[
                     {"role": "system", "content": "You are a research analyst that provides concise, insightful analysis of content."},
                     {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=150
+                ]
             )
             return response.choices[0].message.content.strip()
         except Exception as e:
-            logger.error(f"Error analyzing findings: {str(e)}")
+            logger.error("Error analyzing findings: %s", e)
             return "Unable to analyze content at this time."
 
+    def _analyze_all_findings(self, findings: Dict[str, str]) -> Dict[str, str]:
+        """Analyze findings for all sub-questions with a single JSON completion,
+        falling back to one call per question for anything that cannot be parsed"""
+        if len(findings) <= 1:
+            return {question: self._analyze_findings(question, content) for question, content in findings.items()}
+
+        questions = list(findings)
+        sections = "\n\n".join(
+            f"Question {i}: {question}\nContent:\n{findings[question][:2000]}"
+            for i, question in enumerate(questions, 1)
+        )
+        prompt = f"""Analyze each of the following contents in relation to its question.
+
+        {sections}
+
+        For each question, provide a brief analysis (2-3 sentences) of how its content relates to the question.
+        Focus on key insights and relevance.
+        Respond with only a JSON object mapping each question number (as a string) to its analysis."""
+
+        analyses = {}
+        try:
+            response = self.router.complete(
+                "analysis",
+                messages=[
+                    {"role": "system", "content": "You are a research analyst that provides concise, insightful analysis of content."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=self.router.routes["analysis"].max_tokens * len(questions) + 50
+            )
+            raw = response.choices[0].message.content
+            # Tolerate code fences or stray text around the JSON object
+            parsed = json.loads(raw[raw.index("{"):raw.rindex("}") + 1])
+            for i, question in enumerate(questions, 1):
+                analysis = parsed.get(str(i))
+                if isinstance(analysis, str) and analysis.strip():
+                    analyses[question] = analysis.strip()
+        except Exception as e:
+            logger.warning("Batched analysis failed, falling back to per-question analysis: %s", e)
+
+        for question in questions:
+            if question not in analyses:
+                analyses[question] = self._analyze_findings(question, findings[question])
+        return analyses
+
     def _generate_analysis_steps(self, query: str, sub_questions: List[str], findings: Dict[str, List[Dict[str, Any]]]) -> List[str]:
         """Generate analysis steps based on the research process"""
         steps = [
@@ -242,8 +301,29 @@ class ResearchAgent:
         
         return steps
 
-    async def handle(self, query: str) -> QueryResponse:
+    def _record_stage(self, mode: str, stage: str, started: float) -> float:
+        """Record how long a pipeline stage took and return the start time of the next one"""
+        now = time.monotonic()
+        self.stage_latencies.record(mode, stage, now - started)
+        return now
+
+    async def _run_shared(self, batch: Optional[BatchContext], stage: str, key: Hashable,
+                          func: Callable[..., Any], *args) -> Any:
+        """Run a blocking stage off the event loop, sharing it with the rest of the batch if any"""
+        if batch is None:
+            return await asyncio.to_thread(func, *args)
+        return await batch.run(stage, key, func, *args)
+
+    async def _check_content(self, batch: Optional[BatchContext], text: str) -> tuple[bool, str]:
+        """Content safety check, deduplicated across a batch"""
+        return await self._run_shared(batch, "moderation", ("content", text), self.safety._check_content_safety, text)
+
+    async def handle(self, query: str, mode: str = "standard", batch: Optional[BatchContext] = None) -> QueryResponse:
         try:
+            profile = get_profile(mode)
+            stage_started = time.monotonic()
+            research_deadline = stage_started + profile.latency_budget * RESEARCH_BUDGET_SHARE
+
             # Initialize thought process tracking
             thought_process = {
                 "sub_questions": [],
@@ -258,70 +338,110 @@ class ResearchAgent:
                 raise ValueError("Query cannot be empty after sanitization")
 
             # Check query safety
-            is_safe, reason = self.safety.check_query(clean_query)
+            is_safe, reason = await self._run_shared(batch, "moderation", ("query", clean_query), self.safety.check_query, clean_query)
             if not is_safe:
                 raise ValueError(f"Query rejected for safety reasons: {reason}")
 
-            # 2. Generate sub-questions
-            logger.info("Generating sub-questions for comprehensive research")
-            sub_questions = self._generate_sub_questions(clean_query)
-            
-            # Safety check sub-questions
-            for question in sub_questions:
-                is_safe, reason = self.safety.check_query(question)
-                if not is_safe:
-                    logger.warning(f"Sub-question rejected for safety reasons: {reason}")
-                    sub_questions.remove(question)
+            response_key = f"{profile.name}|{clean_query}"
+            cached = await asyncio.to_thread(self.response_cache.get, response_key)
+            if cached is not None:
+                logger.info("Serving cached response for query")
+                return cached
+
+            # 2. Generate sub-questions (fast mode researches the query as-is)
+            sub_questions = []
+            if not profile.decompose:
+                sub_questions.append(clean_query)
+            else:
+                logger.info("Generating sub-questions for comprehensive research")
+                generated = await self._run_shared(batch, "llm", ("sub_questions", clean_query, profile.max_sub_questions),
+                                                   self._generate_sub_questions, clean_query, profile.max_sub_questions)
+
+                # Safety check sub-questions
+                for question in generated:
+                    is_safe, reason = await self._run_shared(batch, "moderation", ("query", question), self.safety.check_query, question)
+                    if not is_safe:
+                        logger.warning("Sub-question rejected for safety reasons: %s", reason)
+                        continue
+                    sub_questions.append(question)
             
             if not sub_questions:
                 raise ValueError("No safe sub-questions could be generated")
                 
             thought_process["sub_questions"] = sub_questions
-            logger.info(f"Generated sub-questions: {sub_questions}")
+            logger.info("Generated sub-questions: %s", sub_questions)
+            stage_started = self._record_stage(profile.name, "decompose", stage_started)
 
             # 3. Research each sub-question
             all_results = []
             all_sources = []
             findings = {}
+            analysis_inputs = {}  # sub-question -> combined content, analyzed in one call later
+            num_results = min(profile.results_per_question, self.max_search_results)
             
             for sub_q in sub_questions:
-                if len(all_sources) >= self.max_total_sources:
-                    logger.info(f"Reached maximum number of sources ({self.max_total_sources})")
+                if len(all_sources) >= profile.max_total_sources:
+                    logger.info("Reached maximum number of sources (%s)", profile.max_total_sources)
+                    break
+                if time.monotonic() > research_deadline:
+                    logger.info("Research time budget for '%s' mode reached", profile.name)
                     break
 
-                logger.info(f"Researching sub-question: {sub_q}")
+                logger.info("Researching sub-question: %s", sub_q, extra=SAMPLED)
                 
-                # Web search for this sub-question
-                results = self.searcher.search(sub_q, num_results=min(3, self.max_search_results))
+                # Answer from the local corpus when it has enough fresh, relevant documents,
+                # otherwise fall back to web search for this sub-question
+                local_hits = []
+                if self.corpus:
+                    local_hits = await self._run_shared(batch, "corpus", ("lookup", sub_q, num_results),
+                                                        self.corpus.lookup, sub_q, num_results)
+                if self.corpus and len(local_hits) >= self.corpus.min_results:
+                    logger.info("Using %s local corpus documents for sub-question: %s", len(local_hits), sub_q, extra=SAMPLED)
+                    results = self.corpus.as_search_results(local_hits)
+                    local_content = {hit['url']: hit['content'] for hit in local_hits}
+                else:
+                    results = await self._run_shared(batch, "search", (sub_q, num_results), self.searcher.search, sub_q, num_results)
+                    local_content = {}
                 
                 # Filter out potentially harmful search results
-                safe_results = self.safety.check_search_results(results)
+                moderation_key = ("search_results", tuple((r.get('title'), r.get('snippet')) for r in results))
+                safe_results = await self._run_shared(batch, "moderation", moderation_key, self.safety.check_search_results, results)
                 thought_process["search_results"][sub_q] = safe_results
                 
                 if not safe_results:
-                    logger.warning(f"No safe results found for sub-question: {sub_q}")
+                    logger.warning("No safe results found for sub-question: %s", sub_q)
                     continue
 
                 # Extract content from sources
                 sub_question_content = []
-                for item in safe_results:
-                    if len(all_sources) >= self.max_total_sources:
+                for item in self.parser.prioritize(safe_results):
+                    if len(all_sources) >= profile.max_total_sources or time.monotonic() > research_deadline:
                         break
 
                     if any(s['url'] == item['link'] for s in all_sources):
                         continue
                         
                     if item['link'].lower().endswith(('.pdf', '.doc', '.docx')):
-                        logger.info(f"Skipping non-HTML content: {item['link']}")
+                        logger.info("Skipping non-HTML content: %s", item['link'], extra=SAMPLED)
                         continue
                         
-                    text = self.parser.fetch_and_parse(item['link'])
+                    if item['link'] in local_content:
+                        text, fresh = local_content[item['link']], False
+                    else:
+                        text, fresh = await self._run_shared(batch, "fetch", item['link'],
+                                                             self.parser.fetch_and_extract, item['link'])
                     if text:
                         # Safety check the parsed content
-                        is_safe, reason = self.safety._check_content_safety(text)
+                        is_safe, reason = await self._check_content(batch, text)
                         if not is_safe:
-                            logger.warning(f"Content rejected for safety reasons: {reason}")
+                            logger.warning("Content rejected for safety reasons: %s", reason, extra=SAMPLED)
                             continue
+
+                        # Keep freshly extracted pages for future lookups; cached pages are already
+                        # indexed, and re-adding them would reset their fetched_at
+                        if fresh and self.corpus:
+                            await self._run_shared(batch, "corpus", ("add", item['link']),
+                                                   self.corpus.add, item['link'], item['title'], text)
                             
                         content = text[:3000]
                         sub_question_content.append(content)
@@ -335,17 +455,18 @@ class ResearchAgent:
                             'url': item['link']
                         })
                 
-                # Analyze findings for this sub-question
-                if sub_question_content:
+                # Queue findings for this sub-question for analysis
+                if sub_question_content and profile.run_analysis:
                     combined_content = "\n".join(sub_question_content)
                     # Safety check the analysis
-                    is_safe, reason = self.safety._check_content_safety(combined_content)
+                    is_safe, reason = await self._check_content(batch, combined_content)
                     if not is_safe:
-                        logger.warning(f"Analysis rejected for safety reasons: {reason}")
+                        logger.warning("Analysis rejected for safety reasons: %s", reason)
                         thought_process["content_summary"][sub_q] = "Content analysis skipped due to safety concerns"
                     else:
-                        analysis = self._analyze_findings(sub_q, combined_content)
-                        thought_process["content_summary"][sub_q] = analysis
+                        analysis_inputs[sub_q] = combined_content
+
+            stage_started = self._record_stage(profile.name, "research", stage_started)
 
             if not all_results:
                 return QueryResponse(
@@ -361,32 +482,79 @@ class ResearchAgent:
                 thought_process["search_results"]
             )
 
-            # 5. Generate comprehensive summary
+            # 5. Generate comprehensive summary, analyzing sub-question findings alongside it.
+            # The answer does not depend on the analyses, so they stay off the critical path.
             logger.info("Generating comprehensive summary")
-            sources_text, content_text = self._prepare_summary_content(all_results, all_sources)
+            # The profile sizes the answer for its mode; the summary route caps it
+            summary_tokens = min(profile.summary_max_tokens, self.router.routes["summary"].max_tokens)
+            sources_text, content_text = self._prepare_summary_content(all_results, all_sources, clean_query, summary_tokens)
             
-            answer = self._generate_summary(clean_query, sources_text, content_text)
+            answer, analyses = await asyncio.gather(
+                self._run_shared(batch, "llm", ("summary", clean_query, sources_text, content_text, summary_tokens),
+                                 self._generate_summary, clean_query, sources_text, content_text, summary_tokens),
+                self._run_shared(batch, "llm", ("analysis", tuple(analysis_inputs.items())),
+                                 self._analyze_all_findings, analysis_inputs)
+            )
+            thought_process["content_summary"].update(analyses)
             if not answer:
                 raise ValueError("Failed to generate summary after multiple attempts")
 
             # 6. Final safety check
-            is_safe, reason = self.safety._check_content_safety(answer)
+            is_safe, reason = await self._check_content(batch, answer)
             if not is_safe:
                 raise ValueError(f"Generated content rejected for safety reasons: {reason}")
 
+            self._record_stage(profile.name, "synthesis", stage_started)
+
             # 7. Return response with thought process
-            return QueryResponse(
+            response = QueryResponse(
                 thought_process=ThoughtProcess(**thought_process),
                 answer=answer,
                 sources=[Source(title=s['title'], url=s['url']) for s in all_sources]
             )
+            await asyncio.to_thread(self.response_cache.set, response_key, response)
+            return response
 
         except ValueError as e:
-            logger.warning(f"Validation or safety error: {str(e)}")
+            logger.warning("Validation or safety error: %s", e)
             raise
         except RateLimitError as e:
-            logger.error(f"Rate limit exceeded after {self.max_retries} retries: {str(e)}")
+            logger.error("Rate limit exceeded after %s retries: %s", self.max_retries, e)
             raise ValueError("The service is currently experiencing high demand. Please try again in a few moments.")
         except Exception as e:
-            logger.error(f"Error in research agent: {str(e)}")
-            raise ValueError("An unexpected error occurred while processing your request. Please try again later.") 
\ No newline at end of file
+            logger.error("Error in research agent: %s", e)
+            raise ValueError("An unexpected error occurred while processing your request. Please try again later.")
+
+    async def handle_batch(self, queries: List[str], mode: str = "standard") -> List[BatchQueryResult]:
+        """Research a list of queries together, sharing identical work across the batch.
+
+        The batch's stage limits (batch_limits) bound how much of it runs at once.
+        """
+        if not queries:
+            raise ValueError("Batch must contain at least one query")
+        if len(queries) > self.max_batch_size:
+            raise ValueError(f"Batch cannot contain more than {self.max_batch_size} queries")
+        get_profile(mode)  # Reject an unknown mode once rather than per query
+
+        batch = BatchContext(self.batch_limits)
+        parent_id = request_id_var.get()
+
+        async def handle_one(index: int, query: str) -> QueryResponse:
+            # Each query runs in its own task, so this only tags that query's log lines
+            request_id_var.set(f"{parent_id}.{index}")
+            return await self.handle(query, mode=mode, batch=batch)
+
+        outcomes = await asyncio.gather(
+            *(handle_one(i, query) for i, query in enumerate(queries)),
+            return_exceptions=True
+        )
+
+        results = []
+        for query, outcome in zip(queries, outcomes):
+            if isinstance(outcome, Exception):
+                results.append(BatchQueryResult(query=query, error=str(outcome)))
+            else:
+                results.append(BatchQueryResult(query=query, response=outcome))
+
+        logger.info("Completed batch of %s queries: %s work items executed, %s reused", len(queries), batch.executed, batch.reused)
+        return results
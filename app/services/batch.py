@@ -0,0 +1,43 @@
+import asyncio
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class BatchContext:
+    """Shares work between the queries of a single batch.
+
+    Every unit of work (a sub-question generation, a search, a URL fetch, a
+    moderation call, ...) is identified by a stage name and a key. The first
+    query that asks for a given (stage, key) pair starts it; every other query
+    awaits the same in-flight task. Each stage runs under its own semaphore so
+    the whole batch shares one set of concurrency limits.
+    """
+
+    def __init__(self, limits: Dict[str, int], default_limit: int = 4):
+        self.limits = limits
+        self.default_limit = default_limit
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._tasks: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+        self.executed = 0
+        self.reused = 0
+
+    def _semaphore(self, stage: str) -> asyncio.Semaphore:
+        if stage not in self._semaphores:
+            self._semaphores[stage] = asyncio.Semaphore(self.limits.get(stage, self.default_limit))
+        return self._semaphores[stage]
+
+    async def _execute(self, stage: str, func: Callable[..., Any], *args) -> Any:
+        async with self._semaphore(stage):
+            return await asyncio.to_thread(func, *args)
+
+    async def run(self, stage: str, key: Hashable, func: Callable[..., Any], *args) -> Any:
+        """Run func(*args) once per (stage, key) for the lifetime of the batch"""
+        task_key = (stage, key)
+        task: Optional[asyncio.Future] = self._tasks.get(task_key)
+        if task is None:
+            self.executed += 1
+            task = asyncio.ensure_future(self._execute(stage, func, *args))
+            self._tasks[task_key] = task
+        else:
+            self.reused += 1
+        # Shield so that one query being cancelled does not cancel shared work
+        return await asyncio.shield(task)
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+from pydantic import BaseModel
+from app.models.schemas import QueryResponse, ThoughtProcess, Source
+from app.utils.logger import logger
+
+# Pydantic models that can be stored in the cache and rebuilt on the way out
+CACHEABLE_MODELS: Dict[str, Type[BaseModel]] = {
+    model.__name__: model for model in (QueryResponse, ThoughtProcess, Source)
+}
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize plain JSON data or a registered pydantic model"""
+    if isinstance(value, BaseModel):
+        value = {"__model__": type(value).__name__, "data": value.model_dump(mode="json")}
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    value = json.loads(data)
+    if isinstance(value, dict) and "__model__" in value:
+        return CACHEABLE_MODELS[value["__model__"]].model_validate(value["data"])
+    return value
+
+
+class CacheBackend:
+    """Byte-level key/value store with optional per-entry TTL in seconds"""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache"""
+
+    def __init__(self, max_entries: int = 10000, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._entries[key] = (value, self.clock() + ttl if ttl else None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteCache(CacheBackend):
+    """File-backed cache shared by all worker processes on one host"""
+
+    def __init__(self, path: str, purge_every: int = 1000, clock: Callable[[], float] = time.time):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.purge_every = purge_every  # Drop expired rows every N writes
+        self.clock = clock
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, self.clock())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, self.clock() + ttl if ttl else None)
+            )
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (self.clock(),))
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+
+class RedisCache(CacheBackend):
+    """Cache shared across hosts through any Redis-protocol server.
+
+    Pass an existing client (anything with Redis-style get/set/delete, such as
+    an in-memory fake in tests), or a URL to connect with the redis package.
+    """
+
+    def __init__(self, url: Optional[str] = None, client: Any = None):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ValueError("The redis package is required for CACHE_BACKEND=redis") from e
+            client = redis.Redis.from_url(url or "redis://localhost:6379/0")
+        self.client = client
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        if ttl:
+            self.client.set(key, value, ex=max(1, int(ttl)))
+        else:
+            self.client.set(key, value)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(key)
+
+
+def create_cache_backend() -> CacheBackend:
+    """Backend selected by CACHE_BACKEND (memory, sqlite or redis) and CACHE_URL"""
+    kind = os.getenv("CACHE_BACKEND", "memory").lower()
+    url = os.getenv("CACHE_URL")
+    if kind == "memory":
+        return MemoryCache()
+    if kind == "sqlite":
+        return SQLiteCache(url or "data/cache.db")
+    if kind == "redis":
+        return RedisCache(url)
+    raise ValueError(f"Unknown CACHE_BACKEND '{kind}'. Choose one of: memory, sqlite, redis")
+
+
+class Cache:
+    """Namespaced, versioned view over a backend that stores serialized values.
+
+    Keys are hashed under `<prefix>:<namespace>:v<version>:`, so bumping a
+    namespace's version invalidates its entries without touching others. Backend
+    failures are logged and treated as misses so that caching never fails a request.
+    """
+
+    def __init__(self, backend: CacheBackend, namespace: str, version: int = 1,
+                 ttl: Optional[float] = None, prefix: str = "research"):
+        self.backend = backend
+        self.namespace = namespace
+        self.version = version
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return f"{self.prefix}:{self.namespace}:v{self.version}:{digest}"
+
+    def get(self, key: str) -> Any:
+        try:
+            data = self.backend.get(self.key(key))
+            value = None if data is None else loads(data)
+        except Exception as e:
+            logger.warning("Cache read failed for %s: %s", self.namespace, e)
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        try:
+            self.backend.set(self.key(key), dumps(value), ttl or self.ttl)
+        except Exception as e:
+            logger.warning("Cache write failed for %s: %s", self.namespace, e)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hits / total, 3) if total else 0.0}
@@ -1,58 +1,174 @@
 import requests
 from newspaper import Article
-from trafilatura import fetch_url, extract
-from app.utils.logger import logger
-from typing import Optional
+from trafilatura import extract
+from app.services.domain_health import DomainHealth
+from app.services.cache import Cache
+from app.utils.logger import logger, SAMPLED
+from typing import Optional, List, Dict, Any, Tuple
+import re
+import time
+
+# Content types we know how to extract text from
+TEXT_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain', 'text/xml', 'application/xml')
+
+# Leading bytes of common binary formats served without a telling URL extension
+BINARY_SIGNATURES = (
+    b'%PDF',                # PDF
+    b'PK\x03\x04',          # ZIP, DOCX, XLSX, EPUB
+    b'\xd0\xcf\x11\xe0',    # legacy MS Office (DOC, XLS, PPT)
+    b'\x89PNG',             # PNG
+    b'\xff\xd8\xff',        # JPEG
+    b'GIF8',                # GIF
+    b'\x1f\x8b',            # gzip served as the body itself
+    b'ID3',                 # MP3
+    b'\x00\x00\x00',        # MP4 / MOV boxes
+    b'RIFF',                # WAV, AVI, WEBP
+)
 
 class ContentParser:
-    def __init__(self):
+    def __init__(self, health: Optional[DomainHealth] = None, max_download_bytes: int = 2 * 1024 * 1024,
+                 timeout: float = 10, chunk_size: int = 16 * 1024, cache: Optional[Cache] = None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        self.health = health or DomainHealth()
+        self.max_download_bytes = max_download_bytes  # Cap on decompressed body size
+        self.timeout = timeout  # Per-read timeout and overall download deadline, in seconds
+        self.chunk_size = chunk_size
+        self.cache = cache  # Successfully extracted pages, keyed by URL
+
+    def prioritize(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Order search results so that healthier domains are fetched first"""
+        return sorted(results, key=lambda item: self.health.score(item.get('link', '')), reverse=True)
+
+    def _is_text_content_type(self, content_type: str) -> bool:
+        return content_type.split(';')[0].strip().lower() in TEXT_CONTENT_TYPES
+
+    def _looks_binary(self, head: bytes) -> bool:
+        """Sniff the first bytes of a body for binary content"""
+        return head.startswith(BINARY_SIGNATURES) or b'\x00' in head[:1024]
+
+    def _detect_encoding(self, content_type: str, head: bytes) -> str:
+        """Charset from the Content-Type header, then from a <meta> tag, defaulting to UTF-8"""
+        match = re.search(r'charset=["\']?([\w-]+)', content_type, re.IGNORECASE)
+        if not match:
+            match = re.search(rb'<meta[^>]+charset=["\']?([\w-]+)', head[:2048], re.IGNORECASE)
+            if match:
+                return match.group(1).decode('ascii', errors='ignore') or 'utf-8'
+        return match.group(1) if match else 'utf-8'
+
+    def _download(self, url: str) -> Tuple[Optional[str], Optional[str]]:
+        """Stream a page body, aborting early on binary content or once the byte cap is reached.
+
+        Returns (body, skip_reason): a skip reason means the page was deliberately not
+        downloaded (non-text, oversized or binary content); no body and no reason is a failure.
+        """
+        deadline = time.monotonic() + self.timeout
+        try:
+            with requests.get(url, headers=self.headers, timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+
+                content_type = response.headers.get('Content-Type', '')
+                if content_type and not self._is_text_content_type(content_type):
+                    logger.info("Skipping non-text content (%s): %s", content_type, url, extra=SAMPLED)
+                    return None, "non-text content"
+
+                content_length = response.headers.get('Content-Length', '')
+                if content_length.isdigit() and int(content_length) > self.max_download_bytes:
+                    logger.info("Skipping oversized content (%s bytes): %s", content_length, url, extra=SAMPLED)
+                    return None, "oversized content"
+
+                # iter_content decompresses gzip/deflate incrementally, so the cap
+                # applies to decoded bytes and bounds compression bombs as well
+                chunks = []
+                size = 0
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    if not chunks and self._looks_binary(chunk):
+                        logger.info("Skipping binary content: %s", url, extra=SAMPLED)
+                        return None, "binary content"
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= self.max_download_bytes:
+                        logger.info("Download of %s reached %s bytes, truncating", url, self.max_download_bytes, extra=SAMPLED)
+                        break
+                    if time.monotonic() > deadline:
+                        logger.info("Download of %s exceeded %ss, truncating", url, self.timeout, extra=SAMPLED)
+                        break
 
-    def _try_newspaper(self, url: str) -> Optional[str]:
+                body = b''.join(chunks)[:self.max_download_bytes]
+                try:
+                    return body.decode(self._detect_encoding(content_type, body), errors='replace'), None
+                except LookupError:
+                    # Unknown charset declared by the page
+                    return body.decode('utf-8', errors='replace'), None
+        except Exception as e:
+            logger.debug("Download failed for %s: %s", url, e, extra=SAMPLED)
+            return None, None
+
+    def _try_newspaper(self, url: str, html: str) -> Optional[str]:
         """Try to parse content using newspaper3k"""
         try:
             article = Article(url)
-            article.download()
+            article.download(input_html=html)
             article.parse()
             if article.text:
                 return article.text
         except Exception as e:
-            logger.debug(f"Newspaper3k parsing failed for {url}: {str(e)}")
+            logger.debug("Newspaper3k parsing failed for %s: %s", url, e, extra=SAMPLED)
         return None
 
-    def _try_trafilatura(self, url: str) -> Optional[str]:
+    def _try_trafilatura(self, url: str, html: str) -> Optional[str]:
         """Try to parse content using trafilatura"""
         try:
-            downloaded = fetch_url(url, headers=self.headers)
-            if downloaded:
-                text = extract(downloaded, include_comments=False, include_tables=True)
-                if text:
-                    return text
+            text = extract(html, url=url, include_comments=False, include_tables=True)
+            if text:
+                return text
         except Exception as e:
-            logger.debug(f"Trafilatura parsing failed for {url}: {str(e)}")
+            logger.debug("Trafilatura parsing failed for %s: %s", url, e, extra=SAMPLED)
         return None
 
     def fetch_and_parse(self, url: str) -> str:
         """Fetch and parse content from URL using multiple methods"""
-        logger.info(f"Fetching and parsing URL: {url}")
-        
-        # Try newspaper3k first
-        content = self._try_newspaper(url)
-        if content:
-            return content
+        return self.fetch_and_extract(url)[0]
+
+    def fetch_and_extract(self, url: str) -> Tuple[str, bool]:
+        """Fetch and parse content from URL, also reporting whether the text was freshly
+        extracted from a download (False for page cache hits and raw-body fallbacks)"""
+        if self.cache:
+            cached = self.cache.get(url)
+            if cached is not None:
+                return cached, False
+
+        if not self.health.allow(url):
+            logger.info("Skipping URL from unhealthy domain: %s", url, extra=SAMPLED)
+            return "", False
 
-        # If newspaper3k fails, try trafilatura
-        content = self._try_trafilatura(url)
+        logger.info("Fetching and parsing URL: %s", url, extra=SAMPLED)
+        started = time.monotonic()
+
+        # Download once and share the body between extractors
+        html, skip_reason = self._download(url)
+        if skip_reason:
+            # Content we choose not to parse says nothing about the domain's health
+            self.health.release(url)
+            return "", False
+        if not html:
+            logger.error("All parsing methods failed for %s: no usable content downloaded", url)
+            self.health.record(url, False, time.monotonic() - started)
+            return "", False
+
+        # Try newspaper3k first
+        content = self._try_newspaper(url, html)
+        if not content:
+            # If newspaper3k fails, try trafilatura
+            content = self._try_trafilatura(url, html)
         if content:
-            return content
+            self.health.record(url, True, time.monotonic() - started, len(content))
+            if self.cache:
+                self.cache.set(url, content)
+            return content, True
 
-        # If both methods fail, try a simple requests fallback
-        try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            return response.text[:2000]  # Limit size for fallback
-        except Exception as e:
-            logger.error(f"All parsing methods failed for {url}: {str(e)}")
-            return "" 
\ No newline at end of file
+        # If both methods fail, fall back to the raw body. It is still returned
+        # but does not count as a successful extraction.
+        self.health.record(url, False, time.monotonic() - started)
+        return html[:2000], False  # Limit size for fallback
@@ -0,0 +1,261 @@
+import argparse
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+from app.utils.logger import logger
+
+# Words too common to help ranking; dropped from full-text queries
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "in",
+    "is", "it", "of", "on", "or", "that", "the", "their", "there", "these", "this", "to", "was",
+    "what", "when", "where", "which", "who", "why", "will", "with"
+}
+
+# FTS5's bm25() term-frequency saturation constant
+BM25_K1 = 1.2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    url TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_fetched_at ON documents(fetched_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, content, content='documents', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content);
+    INSERT INTO documents_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content);
+END;
+"""
+
+class ResearchCorpus:
+    """Local full-text index of pages the agent has already fetched and extracted.
+
+    Documents are stored in SQLite with an FTS5 index over title and content.
+    `lookup` returns fresh documents that rank well for a question, so that the
+    agent can skip web search and page fetches when local recall is good enough.
+    """
+
+    def __init__(self, path: str, max_age: float = 7 * 24 * 3600, min_score: float = 0.3,
+                 min_coverage: float = 0.6, min_results: int = 2, max_document_chars: int = 50000):
+        self.path = path
+        self.max_age = max_age  # Documents older than this (seconds) are not served
+        # Minimum BM25 score for a hit, as a share of the best score the query's terms
+        # could reach. Absolute BM25 values depend on corpus size and make-up.
+        self.min_score = min_score
+        self.min_coverage = min_coverage  # Minimum share of query terms a hit must contain as tokens
+        self.min_results = min_results  # Hits needed before web search is skipped
+        self.max_document_chars = max_document_chars
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> Optional["ResearchCorpus"]:
+        """Open the corpus at RESEARCH_CORPUS_PATH; an empty value disables it"""
+        path = os.getenv("RESEARCH_CORPUS_PATH", "data/research_corpus.db")
+        if not path:
+            return None
+        try:
+            return cls(path)
+        except sqlite3.Error as e:
+            logger.error("Failed to open research corpus at %s: %s", path, e)
+            return None
+
+    def _terms(self, text: str) -> List[str]:
+        words = re.findall(r"\w+", text.lower())
+        return list(dict.fromkeys(w for w in words if len(w) > 2 and w not in STOPWORDS))
+
+    def add(self, url: str, title: str, content: str, fetched_at: Optional[float] = None) -> None:
+        """Insert or refresh a document"""
+        with self._lock, self._conn:
+            self._upsert(url, title, content, fetched_at)
+
+    def _upsert(self, url: str, title: str, content: str, fetched_at: Optional[float]) -> None:
+        self._conn.execute(
+            """INSERT INTO documents (url, title, content, fetched_at) VALUES (?, ?, ?, ?)
+               ON CONFLICT(url) DO UPDATE SET title = excluded.title, content = excluded.content,
+               fetched_at = excluded.fetched_at""",
+            (url, title or url, content[:self.max_document_chars], fetched_at or time.time())
+        )
+
+    def bulk_ingest(self, records: Iterable[Dict[str, Any]], batch_size: int = 500) -> int:
+        """Ingest records with url, content and optional title and fetched_at keys"""
+        count = 0
+        pending = []
+        for record in records:
+            if not record.get("url") or not record.get("content"):
+                continue
+            pending.append(record)
+            if len(pending) >= batch_size:
+                count += self._ingest_batch(pending)
+                pending = []
+        if pending:
+            count += self._ingest_batch(pending)
+        return count
+
+    def _ingest_batch(self, records: List[Dict[str, Any]]) -> int:
+        with self._lock, self._conn:
+            for record in records:
+                self._upsert(record["url"], record.get("title", ""), record["content"], record.get("fetched_at"))
+        return len(records)
+
+    def _max_score(self, terms: List[str]) -> float:
+        """Upper bound of bm25() for an OR query over these terms: each term's IDF, as
+        FTS5 computes it, times the most its saturated term frequency can add"""
+        total = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        bound = 0.0
+        for term in terms:
+            matching = self._conn.execute(
+                "SELECT COUNT(*) FROM documents_fts WHERE documents_fts MATCH ?", (f'"{term}"',)
+            ).fetchone()[0]
+            idf = math.log((total - matching + 0.5) / (matching + 0.5))
+            bound += (idf if idf > 0 else 1e-6) * (BM25_K1 + 1)
+        return bound
+
+    def _matched_terms(self, terms: List[str], rowids: List[int]) -> Dict[int, int]:
+        """How many of the terms each document contains as full-text tokens"""
+        placeholders = ",".join("?" * len(rowids))
+        counts = dict.fromkeys(rowids, 0)
+        for term in terms:
+            for row in self._conn.execute(
+                f"SELECT rowid FROM documents_fts WHERE documents_fts MATCH ? AND rowid IN ({placeholders})",
+                (f'"{term}"', *rowids)
+            ):
+                counts[row[0]] += 1
+        return counts
+
+    def lookup(self, question: str, limit: int = 3) -> List[Dict[str, Any]]:
+        """Fresh, well-ranked documents for a question, best first"""
+        terms = self._terms(question)
+        if not terms:
+            return []
+
+        match = " OR ".join(f'"{term}"' for term in terms)
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT d.rowid, d.url, d.title, d.content, d.fetched_at,
+                          snippet(documents_fts, 1, '', '', '...', 24) AS snippet,
+                          -bm25(documents_fts, 2.0, 1.0) AS score
+                   FROM documents_fts JOIN documents d ON d.rowid = documents_fts.rowid
+                   WHERE documents_fts MATCH ? AND d.fetched_at >= ?
+                   ORDER BY score DESC LIMIT ?""",
+                (match, time.time() - self.max_age, limit * 3)
+            ).fetchall()
+            if not rows:
+                return []
+            max_score = self._max_score(terms)
+            matched = self._matched_terms(terms, [row["rowid"] for row in rows])
+
+        hits = []
+        for row in rows:
+            score = row["score"] / max_score
+            if score < self.min_score:
+                break
+            if matched[row["rowid"]] / len(terms) < self.min_coverage:
+                continue
+            hits.append({
+                "url": row["url"],
+                "title": row["title"],
+                "content": row["content"],
+                "snippet": row["snippet"],
+                "fetched_at": row["fetched_at"],
+                "score": round(score, 3)
+            })
+            if len(hits) >= limit:
+                break
+        return hits
+
+    def as_search_results(self, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Shape corpus hits like WebSearch results"""
+        return [
+            {
+                "title": hit["title"],
+                "link": hit["url"],
+                "snippet": hit["snippet"],
+                "displayLink": urlparse(hit["url"]).netloc
+            }
+            for hit in hits
+        ]
+
+    def compact(self, max_age: Optional[float] = None) -> int:
+        """Drop documents older than max_age seconds, then optimize the index and reclaim space"""
+        cutoff = time.time() - (self.max_age if max_age is None else max_age)
+        with self._lock:
+            with self._conn:
+                removed = self._conn.execute("DELETE FROM documents WHERE fetched_at < ?", (cutoff,)).rowcount
+                self._conn.execute("INSERT INTO documents_fts(documents_fts) VALUES ('optimize')")
+            self._conn.execute("VACUUM")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) AS documents, MIN(fetched_at) AS oldest, MAX(fetched_at) AS newest FROM documents"
+            ).fetchone()
+        return {"path": self.path, "documents": row["documents"], "oldest": row["oldest"], "newest": row["newest"]}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _read_jsonl(path: str) -> Iterable[Dict[str, Any]]:
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    with stream:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage the local research corpus")
+    parser.add_argument("--path", default=os.getenv("RESEARCH_CORPUS_PATH") or "data/research_corpus.db")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Bulk-ingest JSON lines with url, title, content and fetched_at")
+    ingest.add_argument("file", help="JSONL file, or - for stdin")
+
+    compact = commands.add_parser("compact", help="Drop stale documents and optimize the index")
+    compact.add_argument("--max-age-days", type=float, default=None)
+
+    commands.add_parser("stats", help="Show corpus size and age")
+
+    args = parser.parse_args(argv)
+    corpus = ResearchCorpus(args.path)
+    try:
+        if args.command == "ingest":
+            print(f"Ingested {corpus.bulk_ingest(_read_jsonl(args.file))} documents")
+        elif args.command == "compact":
+            max_age = None if args.max_age_days is None else args.max_age_days * 24 * 3600
+            print(f"Removed {corpus.compact(max_age)} stale documents")
+        else:
+            print(json.dumps(corpus.stats(), indent=2))
+    finally:
+        corpus.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from app.utils.stats import percentile
+
+
+def domain_of(url: str) -> str:
+    """Return the host of a URL, without a leading 'www.'"""
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class _DomainStats:
+    def __init__(self, window: int):
+        # (success, latency in seconds, extracted characters)
+        self.samples: Deque[Tuple[bool, float, int]] = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.trial_in_progress = False
+        self.total_fetches = 0
+        self.skipped = 0
+
+
+class DomainHealth:
+    """Rolling per-domain fetch statistics with a circuit breaker.
+
+    A domain's circuit opens after `failure_threshold` consecutive failures, or
+    when its success rate over the recent window drops below `min_success_rate`.
+    While open, fetches are skipped until `cooldown` seconds have passed; a
+    single trial fetch is then let through and closes the circuit on success.
+    """
+
+    def __init__(self, window: int = 50, failure_threshold: int = 3, min_success_rate: float = 0.2,
+                 min_samples: int = 5, cooldown: float = 300, clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.min_success_rate = min_success_rate
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.clock = clock
+        self._stats: Dict[str, _DomainStats] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, domain: str) -> _DomainStats:
+        if domain not in self._stats:
+            self._stats[domain] = _DomainStats(self.window)
+        return self._stats[domain]
+
+    def _success_rate(self, stats: _DomainStats) -> float:
+        if not stats.samples:
+            return 1.0
+        return sum(1 for ok, _, _ in stats.samples if ok) / len(stats.samples)
+
+    def allow(self, url: str) -> bool:
+        """Whether a fetch of this URL should be attempted now"""
+        now = self.clock()
+        with self._lock:
+            stats = self._get(domain_of(url))
+            if stats.open_until <= 0:
+                return True
+            if now >= stats.open_until and not stats.trial_in_progress:
+                # Half-open: let a single trial request through
+                stats.trial_in_progress = True
+                return True
+            stats.skipped += 1
+            return False
+
+    def release(self, url: str) -> None:
+        """End a fetch without an outcome, such as a page skipped for its content type,
+        so that a half-open domain can send another trial request"""
+        with self._lock:
+            stats = self._stats.get(domain_of(url))
+            if stats is not None:
+                stats.trial_in_progress = False
+
+    def record(self, url: str, success: bool, latency: float, extracted_chars: int = 0) -> None:
+        """Record the outcome of a fetch and update the domain's circuit"""
+        with self._lock:
+            stats = self._get(domain_of(url))
+            stats.samples.append((success, latency, extracted_chars))
+            stats.total_fetches += 1
+            stats.trial_in_progress = False
+
+            if success:
+                stats.consecutive_failures = 0
+                stats.open_until = 0.0
+                return
+
+            stats.consecutive_failures += 1
+            failing = stats.consecutive_failures >= self.failure_threshold or (
+                len(stats.samples) >= self.min_samples and self._success_rate(stats) < self.min_success_rate
+            )
+            if failing:
+                stats.open_until = self.clock() + self.cooldown
+
+    def score(self, url: str) -> float:
+        """Higher is healthier; unknown domains score as healthy"""
+        with self._lock:
+            stats = self._stats.get(domain_of(url))
+            if stats is None:
+                return 1.0
+            if stats.open_until > self.clock():
+                return 0.0
+            return self._success_rate(stats)
+
+    def snapshot(self, domain: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            stats = self._stats.get(domain)
+            if stats is None:
+                return None
+            return self._describe(domain, stats, self.clock())
+
+    def _describe(self, domain: str, stats: _DomainStats, now: float) -> Dict[str, Any]:
+        latencies = [latency for _, latency, _ in stats.samples]
+        successes = [chars for ok, _, chars in stats.samples if ok]
+        return {
+            "domain": domain,
+            "fetches": stats.total_fetches,
+            "skipped": stats.skipped,
+            "success_rate": round(self._success_rate(stats), 3),
+            "latency_p50": round(percentile(latencies, 50), 3),
+            "latency_p95": round(percentile(latencies, 95), 3),
+            "avg_extracted_chars": int(sum(successes) / len(successes)) if successes else 0,
+            "circuit_open": stats.open_until > now,
+            "retry_in": max(0, round(stats.open_until - now, 1))
+        }
+
+    def worst(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Domains ordered from least to most healthy"""
+        now = self.clock()
+        with self._lock:
+            rows = [self._describe(domain, stats, now) for domain, stats in self._stats.items() if stats.samples]
+        rows.sort(key=lambda row: (not row["circuit_open"], row["success_rate"], -row["latency_p95"]))
+        return rows[:limit]
@@ -0,0 +1,197 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from openai import APITimeoutError, RateLimitError
+from app.utils.logger import logger
+from app.utils.stats import percentile
+
+
+@dataclass(frozen=True)
+class StageRoute:
+    """Which model a pipeline stage uses, and when to fall back from it"""
+    model: str
+    fallbacks: Tuple[str, ...]
+    max_tokens: int  # Ceiling per call; per question for the batched analysis
+    temperature: float
+    latency_budget: float  # Seconds; the primary is demoted while its recent p95 exceeds this
+    timeout: float  # Seconds; a single call is abandoned after this, so keep it above latency_budget
+
+
+DEFAULT_ROUTES: Dict[str, StageRoute] = {
+    "sub_questions": StageRoute(model="gpt-4o-mini", fallbacks=("gpt-3.5-turbo",), max_tokens=200,
+                                temperature=0.7, latency_budget=5, timeout=20),
+    "analysis": StageRoute(model="gpt-4o-mini", fallbacks=("gpt-3.5-turbo",), max_tokens=150,
+                           temperature=0.7, latency_budget=10, timeout=45),
+    "summary": StageRoute(model="gpt-4", fallbacks=("gpt-4o-mini",), max_tokens=3500,
+                          temperature=0.7, latency_budget=120, timeout=300),
+    "summarize": StageRoute(model="gpt-4", fallbacks=("gpt-4o-mini",), max_tokens=1000,
+                            temperature=0.7, latency_budget=30, timeout=120)
+}
+
+
+# Context windows (prompt plus completion tokens) of the models the routes may use
+CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-4": 8192,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gpt-3.5-turbo": 16385
+}
+DEFAULT_CONTEXT_WINDOW = 8192  # Assumed for models not listed above
+
+# Tokens the chat format adds around the messages of a request
+CHAT_OVERHEAD_TOKENS = 20
+
+
+def load_routes() -> Dict[str, StageRoute]:
+    """Default routes, overridden per stage by MODEL_ROUTES (inline JSON or a path to a JSON file).
+
+    Example: {"summary": {"model": "gpt-4o", "fallbacks": ["gpt-4o-mini"], "latency_budget": 40, "timeout": 120}}
+    """
+    routes = dict(DEFAULT_ROUTES)
+    raw = os.getenv("MODEL_ROUTES")
+    if not raw:
+        return routes
+    if os.path.isfile(raw):
+        with open(raw, encoding="utf-8") as f:
+            raw = f.read()
+    for stage, overrides in json.loads(raw).items():
+        if "fallbacks" in overrides:
+            overrides["fallbacks"] = tuple(overrides["fallbacks"])
+        base = routes.get(stage)
+        routes[stage] = replace(base, **overrides) if base else StageRoute(**overrides)
+    return routes
+
+
+class _ModelStats:
+    def __init__(self, window: int):
+        self.latencies: Deque[Tuple[float, float]] = deque(maxlen=window)  # (recorded at, seconds)
+        self.calls = 0
+        self.failures = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+
+class ModelRouter:
+    """Sends each stage's chat completions to its configured model.
+
+    Each call is bounded by the stage's timeout, with the client's own retries
+    disabled. A model that is rate-limited (or times out) is cooled down for
+    `rate_limit_cooldown` seconds and the next fallback is tried straight away.
+    A primary whose recent p95 latency for the stage exceeds the stage's latency
+    budget is tried after its fallbacks instead of first; timed-out calls count
+    as samples too. Only samples from the last `latency_horizon` seconds count,
+    so a demoted primary is retried once its slow samples age out. Latency and
+    token usage are recorded per stage and model.
+    """
+
+    def __init__(self, client: Any, routes: Optional[Dict[str, StageRoute]] = None,
+                 rate_limit_cooldown: float = 30.0, window: int = 50, min_samples: int = 5,
+                 latency_horizon: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.client = client
+        self.routes = routes or load_routes()
+        self.rate_limit_cooldown = rate_limit_cooldown
+        self.window = window
+        self.min_samples = min_samples  # Samples needed before p95 is trusted
+        self.latency_horizon = latency_horizon
+        self.clock = clock
+        self._stats: Dict[Tuple[str, str], _ModelStats] = {}
+        self._cooldown_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _get_stats(self, stage: str, model: str) -> _ModelStats:
+        key = (stage, model)
+        if key not in self._stats:
+            self._stats[key] = _ModelStats(self.window)
+        return self._stats[key]
+
+    def _is_degraded(self, stage: str, model: str, budget: float) -> bool:
+        with self._lock:
+            if self._cooldown_until.get(model, 0) > self.clock():
+                return True
+            stats = self._stats.get((stage, model))
+            if stats is None:
+                return False
+            cutoff = self.clock() - self.latency_horizon
+            recent = [latency for recorded_at, latency in stats.latencies if recorded_at >= cutoff]
+            return len(recent) >= self.min_samples and percentile(recent, 95) > budget
+
+    def candidates(self, stage: str) -> List[str]:
+        """Models to try for a stage, healthiest first"""
+        route = self.routes[stage]
+        models = [route.model, *route.fallbacks]
+        healthy = [m for m in models if not self._is_degraded(stage, m, route.latency_budget)]
+        return healthy + [m for m in models if m not in healthy]
+
+    def context_window(self, stage: str) -> int:
+        """Smallest context window among a stage's models, so any of them can take the prompt"""
+        route = self.routes[stage]
+        return min(CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW) for model in (route.model, *route.fallbacks))
+
+    def prompt_budget(self, stage: str, completion_tokens: int) -> int:
+        """Tokens a stage's messages may use while leaving room for a completion of this size"""
+        return self.context_window(stage) - completion_tokens - CHAT_OVERHEAD_TOKENS
+
+    def complete(self, stage: str, messages: List[Dict[str, str]], max_tokens: Optional[int] = None,
+                 temperature: Optional[float] = None) -> Any:
+        """Run a chat completion for a stage, falling back across its models"""
+        route = self.routes[stage]
+        # Use the stage's timeout instead of the client's default 600s timeout and
+        # backoff retries, so that a fallback still has time to answer
+        client = self.client.with_options(timeout=route.timeout, max_retries=0)
+        last_error: Optional[Exception] = None
+        for model in self.candidates(stage):
+            started = self.clock()
+            try:
+                response = client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=route.temperature if temperature is None else temperature,
+                    max_tokens=max_tokens or route.max_tokens
+                )
+            except (RateLimitError, APITimeoutError) as e:
+                now = self.clock()
+                with self._lock:
+                    self._cooldown_until[model] = now + self.rate_limit_cooldown
+                    stats = self._get_stats(stage, model)
+                    stats.failures += 1
+                    if isinstance(e, APITimeoutError):
+                        # A timed-out call is as slow as a sample gets; it counts towards p95
+                        stats.latencies.append((now, now - started))
+                logger.warning("Model %s unavailable for %s, trying fallback: %s", model, stage, e)
+                last_error = e
+                continue
+
+            self._record(stage, model, self.clock() - started, getattr(response, "usage", None))
+            return response
+
+        raise last_error
+
+    def _record(self, stage: str, model: str, latency: float, usage: Any) -> None:
+        with self._lock:
+            stats = self._get_stats(stage, model)
+            stats.latencies.append((self.clock(), latency))
+            stats.calls += 1
+            if usage is not None:
+                stats.prompt_tokens += usage.prompt_tokens or 0
+                stats.completion_tokens += usage.completion_tokens or 0
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = []
+            for (stage, model), stats in sorted(self._stats.items()):
+                latencies = [latency for _, latency in stats.latencies]
+                rows.append({
+                    "stage": stage,
+                    "model": model,
+                    "calls": stats.calls,
+                    "failures": stats.failures,
+                    "latency_p50": round(percentile(latencies, 50), 3),
+                    "latency_p95": round(percentile(latencies, 95), 3),
+                    "avg_prompt_tokens": stats.prompt_tokens // stats.calls if stats.calls else 0,
+                    "avg_completion_tokens": stats.completion_tokens // stats.calls if stats.calls else 0
+                })
+            return rows
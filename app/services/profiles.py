@@ -0,0 +1,61 @@
+from dataclasses import dataclass
+from typing import Dict
+
+
+@dataclass(frozen=True)
+class ResearchProfile:
+    """How much work the research pipeline does for a query"""
+    name: str
+    decompose: bool  # Break the query into sub-questions, or research it as-is
+    max_sub_questions: int
+    results_per_question: int  # Search results requested per sub-question
+    max_total_sources: int  # Pages fetched across all sub-questions
+    run_analysis: bool  # Produce per-sub-question analyses for the thought process
+    summary_max_tokens: int
+    latency_budget: float  # Seconds; research stops early to leave time for the summary
+
+
+# Share of the latency budget the research loop may use before moving on to the summary
+RESEARCH_BUDGET_SHARE = 0.6
+
+# Share of the latency budget a request may spend queued for an admission slot
+QUEUE_BUDGET_SHARE = 0.5
+
+PROFILES: Dict[str, ResearchProfile] = {
+    "fast": ResearchProfile(
+        name="fast",
+        decompose=False,
+        max_sub_questions=1,
+        results_per_question=3,
+        max_total_sources=2,
+        run_analysis=False,
+        summary_max_tokens=600,
+        latency_budget=15
+    ),
+    "standard": ResearchProfile(
+        name="standard",
+        decompose=True,
+        max_sub_questions=3,
+        results_per_question=3,
+        max_total_sources=6,
+        run_analysis=True,
+        summary_max_tokens=2500,
+        latency_budget=60
+    ),
+    "deep": ResearchProfile(
+        name="deep",
+        decompose=True,
+        max_sub_questions=5,
+        results_per_question=5,
+        max_total_sources=10,
+        run_analysis=True,
+        summary_max_tokens=3500,
+        latency_budget=120
+    )
+}
+
+
+def get_profile(mode: str) -> ResearchProfile:
+    if mode not in PROFILES:
+        raise ValueError(f"Unknown research mode '{mode}'. Choose one of: {', '.join(PROFILES)}")
+    return PROFILES[mode]
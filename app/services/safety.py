@@ -1,15 +1,17 @@
 import os
 from openai import OpenAI
-from app.utils.logger import logger
+from app.services.cache import Cache
+from app.utils.logger import logger, SAMPLED
 from dotenv import load_dotenv
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 import re
 
 load_dotenv()
 
 class Safety:
-    def __init__(self):
+    def __init__(self, cache: Optional[Cache] = None):
         self.client = OpenAI()
+        self.cache = cache  # Moderation verdicts, keyed by the moderated text
         self.disallowed_categories = [
             "hate", "hate/threatening", "harassment", "harassment/threatening",
             "self-harm", "self-harm/intent", "self-harm/instructions",
@@ -38,6 +40,23 @@ class Safety:
                 return True, f"Content matches harmful pattern: {pattern}"
         return False, ""
 
+    def _moderation_flag(self, text: str) -> str:
+        """Return the first disallowed category OpenAI's moderation flags, or an empty string"""
+        if self.cache:
+            cached = self.cache.get(text)
+            if cached is not None:
+                return cached
+
+        response = self.client.moderations.create(input=text)
+        result = response.results[0]
+        flagged = next(
+            (category for category in self.disallowed_categories if getattr(result.categories, category, False)),
+            ""
+        )
+        if self.cache:
+            self.cache.set(text, flagged)
+        return flagged
+
     def _check_query_safety(self, query: str) -> Tuple[bool, str]:
         """Check if the query itself is safe"""
         # Check for harmful patterns
@@ -47,17 +66,13 @@ class Safety:
 
         # Check with OpenAI's moderation
         try:
-            response = self.client.moderations.create(input=query)
-            result = response.results[0]
-            
-            # Check all categories
-            for category in self.disallowed_categories:
-                if getattr(result.categories, category, False):
-                    return False, f"Query flagged for {category}"
+            flagged = self._moderation_flag(query)
+            if flagged:
+                return False, f"Query flagged for {flagged}"
             
             return True, "Query passed safety checks"
         except Exception as e:
-            logger.error(f"Error in query safety check: {str(e)}")
+            logger.error("Error in query safety check: %s", e)
             return False, "Error during safety check"
 
     def _check_content_safety(self, content: str) -> Tuple[bool, str]:
@@ -73,17 +88,13 @@ class Safety:
 
         # Check with OpenAI's moderation
         try:
-            response = self.client.moderations.create(input=content)
-            result = response.results[0]
-            
-            # Check all categories
-            for category in self.disallowed_categories:
-                if getattr(result.categories, category, False):
-                    return False, f"Content flagged for {category}"
+            flagged = self._moderation_flag(content)
+            if flagged:
+                return False, f"Content flagged for {flagged}"
             
             return True, "Content passed safety checks"
         except Exception as e:
-            logger.error(f"Error in content safety check: {str(e)}")
+            logger.error("Error in content safety check: %s", e)
             return False, "Error during safety check"
 
     def moderate(self, content: str) -> bool:
@@ -92,12 +103,12 @@ class Safety:
             # Check content safety
             is_safe, reason = self._check_content_safety(content)
             if not is_safe:
-                logger.warning(f"Content moderation failed: {reason}")
+                logger.warning("Content moderation failed: %s", reason)
                 return False
 
             return True
         except Exception as e:
-            logger.error(f"Error in moderation: {str(e)}")
+            logger.error("Error in moderation: %s", e)
             return False
 
     def check_query(self, query: str) -> Tuple[bool, str]:
@@ -117,6 +128,6 @@ class Safety:
             if is_safe:
                 safe_results.append(result)
             else:
-                logger.warning(f"Filtered out potentially harmful search result: {title}")
+                logger.warning("Filtered out potentially harmful search result: %s", title, extra=SAMPLED)
         
         return safe_results 
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
 from openai import OpenAI
+from app.services.model_router import ModelRouter
 from app.utils.logger import logger
 from dotenv import load_dotenv
 
@@ -10,7 +11,9 @@ class Summarizer:
         self.api_key = os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY must be set in environment variables")
-        self.client = OpenAI(api_key=self.api_key)
+        # OPENAI_BASE_URL, if set, points the client at another endpoint such as a local fake server
+        self.client = OpenAI(api_key=self.api_key, base_url=os.getenv("OPENAI_BASE_URL"))
+        self.router = ModelRouter(self.client)  # Per-stage model selection and fallbacks
 
     def summarize(self, texts: list[str], query: str) -> str:
         if not texts:
@@ -23,8 +26,8 @@ class Summarizer:
 
         logger.info("Calling OpenAI for summarization")
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
+            response = self.router.complete(
+                "summarize",
                 messages=[
                     {
                         "role": "system",
@@ -34,11 +37,9 @@ class Summarizer:
                         "role": "user",
                         "content": prompt
                     }
-                ],
-                temperature=0.7,
-                max_tokens=1000
+                ]
             )
             return response.choices[0].message.content
         except Exception as e:
-            logger.error(f"Error during summarization: {str(e)}")
+            logger.error("Error during summarization: %s", e)
             raise
@@ -1,14 +1,17 @@
 import os
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from app.utils.logger import logger
+from app.services.cache import Cache
+from app.utils.logger import logger, SAMPLED
 from dotenv import load_dotenv
+from typing import Optional
 
 # Load environment variables from .env
 load_dotenv()
 
 class WebSearch:
-    def __init__(self):
+    def __init__(self, cache: Optional[Cache] = None):
+        self.cache = cache
         self.api_key = os.getenv("GOOGLE_API_KEY")
         self.engine_id = os.getenv("GOOGLE_CSE_ID")
         
@@ -18,11 +21,17 @@ class WebSearch:
         try:
             self.client = build("customsearch", "v1", developerKey=self.api_key)
         except Exception as e:
-            logger.error(f"Failed to initialize Google Search client: {str(e)}")
+            logger.error("Failed to initialize Google Search client: %s", e)
             raise
 
     def search(self, query: str, num_results: int = 5):
-        logger.info(f"[WebSearch] Querying: {query}")
+        cache_key = f"{num_results}|{query}"
+        if self.cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        logger.info("[WebSearch] Querying: %s", query, extra=SAMPLED)
         try:
             res = self.client.cse().list(
                 q=query,
@@ -41,12 +50,14 @@ class WebSearch:
                 }
                 results.append(result)
             
-            logger.info(f"[WebSearch] Retrieved {len(results)} results for: {query}")
+            logger.info("[WebSearch] Retrieved %s results for: %s", len(results), query, extra=SAMPLED)
+            if self.cache and results:
+                self.cache.set(cache_key, results)
             return results
 
         except HttpError as http_err:
-            logger.error(f"[WebSearch] HTTP Error: {http_err}")
+            logger.error("[WebSearch] HTTP Error: %s", http_err)
             return []
         except Exception as e:
-            logger.error(f"[WebSearch] General Error: {str(e)}")
+            logger.error("[WebSearch] General Error: %s", e)
             return []
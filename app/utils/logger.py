@@ -1,7 +1,105 @@
+"""
+Application logging.
+
+Records are handed to a background thread through a queue, so request handlers
+never block on stream writes, and messages are only formatted in that thread.
+Configuration comes from the environment:
+
+- LOG_LEVEL: minimum level (default INFO)
+- LOG_FORMAT: "text" (default) or "json"
+- LOG_SAMPLE_RATE: share of high-volume records to keep (default 1.0). Records
+  logged with `extra=SAMPLED` are sampled; errors are always kept.
+"""
+import atexit
+import contextvars
+import json
 import logging
+import os
+import queue
+import random
+import re
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+# Correlates all log lines of one request; set per request by the HTTP middleware
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+# Client-supplied request ids are only trusted in this shape, so they cannot forge log lines
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+
+def make_request_id(supplied: Optional[str] = None) -> str:
+    """The client's request id if it is safe to log and echo back, otherwise a new one"""
+    if supplied and REQUEST_ID_PATTERN.fullmatch(supplied):
+        return supplied
+    return uuid.uuid4().hex
+
+
+# Pass as `extra=SAMPLED` for per-URL / per-result messages that may be sampled out
+SAMPLED = {"sampled": True}
+
+
+class RequestContextFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False) or record.levelno >= logging.ERROR:
+            return True
+        return random.random() < self.rate
+
+
+class LazyQueueHandler(QueueHandler):
+    """Enqueue records unformatted; the listener thread does the formatting"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _configure() -> logging.Logger:
+    stream_handler = logging.StreamHandler()
+    if os.getenv("LOG_FORMAT", "text").lower() == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(
+            "%(asctime)s — %(name)s — %(levelname)s — [%(request_id)s] %(message)s"
+        ))
+
+    queue_handler = LazyQueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(SamplingFilter(float(os.getenv("LOG_SAMPLE_RATE", "1.0"))))
+    queue_handler.addFilter(RequestContextFilter())
+
+    listener = QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    configured = logging.getLogger("ai_research_assistant")
+    configured.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    configured.addHandler(queue_handler)
+    configured.propagate = False
+    return configured
+
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s — %(name)s — %(levelname)s — %(message)s"
-)
-logger = logging.getLogger("ai_research_assistant") 
\ No newline at end of file
+logger = _configure()
@@ -0,0 +1,78 @@
+import gzip
+from typing import Any, Dict, List, Optional, Type
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+# Responses smaller than this are not worth compressing
+COMPRESSION_THRESHOLD = 1024
+
+
+def build_include(fields: Optional[List[str]], model: Type[BaseModel]) -> Optional[Dict[str, Any]]:
+    """Turn dotted field paths such as "thought_process.sub_questions" into a pydantic include tree.
+
+    Returns None (everything) when no fields are given. Unknown paths raise ValueError.
+    """
+    if not fields:
+        return None
+
+    include: Dict[str, Any] = {}
+    for path in fields:
+        node, current_model = include, model
+        parts = path.split(".")
+        for depth, part in enumerate(parts):
+            if current_model is None or part not in current_model.model_fields:
+                raise ValueError(f"Unknown response field '{path}'")
+            if depth == len(parts) - 1:
+                node[part] = True
+                break
+            if node.get(part) is True:
+                break  # The whole parent is already included
+            annotation = current_model.model_fields[part].annotation
+            current_model = annotation if isinstance(annotation, type) and issubclass(annotation, BaseModel) else None
+            node = node.setdefault(part, {})
+    return include
+
+
+def batch_include(response_include: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Apply a QueryResponse include tree to every result of a BatchQueryResponse"""
+    if response_include is None:
+        return None
+    return {"results": {"__all__": {"query": True, "error": True, "response": response_include}}}
+
+
+def _choose_encoding(request: Request) -> Optional[str]:
+    accepted = {
+        token.split(";")[0].strip().lower()
+        for token in request.headers.get("accept-encoding", "").split(",")
+    }
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def lean_json_response(model: BaseModel, request: Request, include: Optional[Dict[str, Any]] = None,
+                       status_code: int = 200) -> Response:
+    """Serialize an already-validated model straight to JSON, compressing large bodies.
+
+    Returning a Response skips FastAPI's response_model re-validation and the
+    jsonable_encoder pass; pydantic-core writes the JSON directly.
+    """
+    body = model.model_dump_json(include=include).encode("utf-8")
+    headers = {"Vary": "Accept-Encoding"}
+
+    encoding = _choose_encoding(request) if len(body) >= COMPRESSION_THRESHOLD else None
+    if encoding == "br":
+        body = brotli.compress(body, quality=4)
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=5)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
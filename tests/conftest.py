@@ -0,0 +1,19 @@
+import pytest
+
+
+class FakeClock:
+    """Monotonic clock that tests advance by hand"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
@@ -0,0 +1,184 @@
+import asyncio
+import pytest
+from app.services.admission import AdmissionController, AdmissionRejected, StageLatencies
+
+
+def standard_latencies() -> StageLatencies:
+    latencies = StageLatencies()
+    for stage, seconds in (("decompose", 3), ("research", 20), ("synthesis", 15)):
+        latencies.record("standard", stage, seconds)
+    return latencies
+
+
+async def hold_slots(controller: AdmissionController, mode: str, count: int, release: asyncio.Event):
+    async def hold():
+        async with controller.slot(mode):
+            await release.wait()
+
+    tasks = [asyncio.create_task(hold()) for _ in range(count)]
+    await asyncio.sleep(0)
+    return tasks
+
+
+def test_estimate_sums_stage_means_per_mode():
+    latencies = StageLatencies(default_estimate=30, mode_defaults={"fast": 15})
+    assert latencies.estimate("fast") == 15
+    assert latencies.estimate("deep") == 30
+
+    latencies.record("standard", "research", 10)
+    latencies.record("standard", "research", 20)
+    latencies.record("standard", "synthesis", 5)
+    assert latencies.estimate("standard") == 20
+    assert latencies.estimate("deep") == 20  # Falls back to all recorded modes
+    assert latencies.estimate("fast") == 15
+
+
+def test_request_queues_when_slots_are_busy_within_mode_budget():
+    controller = AdmissionController(standard_latencies().estimate, max_in_flight=8,
+                                     queue_timeouts={"standard": 60})
+
+    async def scenario():
+        release = asyncio.Event()
+        held = await hold_slots(controller, "standard", 8, release)
+        queued = await hold_slots(controller, "standard", 1, release)
+        assert controller.in_flight == 8
+        assert controller.waiting == 1
+        assert controller.rejected == 0
+        release.set()
+        await asyncio.gather(*held, *queued)
+
+    asyncio.run(scenario())
+    assert controller.stats() == {"in_flight": 0, "waiting": 0, "batches": 0, "rejected": 0, "estimated_wait": 0.0}
+
+
+def test_estimated_wait_deducts_time_already_spent(clock):
+    controller = AdmissionController(lambda mode=None: 40.0, max_in_flight=2, clock=clock)
+
+    async def scenario():
+        release = asyncio.Event()
+        held = await hold_slots(controller, "standard", 1, release)
+        clock.advance(10)
+        held += await hold_slots(controller, "standard", 1, release)
+        assert controller.estimated_wait() == 30.0  # The older request has 30s left
+
+        clock.advance(5)
+        assert controller.estimated_wait() == 25.0
+        release.set()
+        await asyncio.gather(*held)
+
+    asyncio.run(scenario())
+
+
+def test_estimated_wait_accounts_for_requests_queued_ahead(clock):
+    controller = AdmissionController(lambda mode=None: 40.0, max_in_flight=2, queue_timeout=100, clock=clock)
+
+    async def scenario():
+        release = asyncio.Event()
+        held = await hold_slots(controller, "standard", 2, release)
+        held += await hold_slots(controller, "standard", 2, release)  # Take the next two slots
+        assert controller.waiting == 2
+        assert controller.estimated_wait() == 80.0
+        release.set()
+        await asyncio.gather(*held)
+
+    asyncio.run(scenario())
+
+
+def test_sheds_when_estimated_wait_exceeds_mode_timeout():
+    controller = AdmissionController(standard_latencies().estimate, max_in_flight=1,
+                                     queue_timeouts={"standard": 60, "fast": 15})
+
+    async def scenario():
+        release = asyncio.Event()
+        held = await hold_slots(controller, "standard", 1, release)
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.slot("fast"):
+                pass
+        release.set()
+        await asyncio.gather(*held)
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+    assert rejected.status_code == 503
+    assert rejected.retry_after == 38
+    assert controller.rejected == 1
+
+
+def test_rejects_with_429_when_queue_is_full():
+    controller = AdmissionController(lambda mode=None: 1.0, max_in_flight=1, max_queue=1)
+
+    async def scenario():
+        release = asyncio.Event()
+        held = await hold_slots(controller, None, 2, release)
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.slot():
+                pass
+        release.set()
+        await asyncio.gather(*held)
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+    assert rejected.status_code == 429
+    assert rejected.retry_after >= 1
+
+
+def test_times_out_waiting_for_a_slot():
+    controller = AdmissionController(lambda mode=None: 0.01, max_in_flight=1, queue_timeout=0.05)
+
+    async def scenario():
+        release = asyncio.Event()
+        held = await hold_slots(controller, None, 1, release)
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.slot():
+                pass
+        assert controller.waiting == 0
+        release.set()
+        await asyncio.gather(*held)
+        return rejected.value
+
+    assert asyncio.run(scenario()).status_code == 503
+
+
+def test_batch_holds_a_single_slot():
+    controller = AdmissionController(lambda mode=None: 1.0, max_in_flight=2)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def run_batch():
+            async with controller.batch_slot("standard"):
+                await release.wait()
+
+        batch = asyncio.create_task(run_batch())
+        await asyncio.sleep(0)
+        assert (controller.in_flight, controller.batches) == (1, 1)
+        async with controller.slot("standard"):
+            assert controller.in_flight == 2
+        release.set()
+        await batch
+
+    asyncio.run(scenario())
+    assert controller.stats()["batches"] == 0
+
+
+def test_rejects_batches_beyond_max_batches():
+    controller = AdmissionController(lambda mode=None: 1.0, max_in_flight=8, max_batches=2)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def run_batch():
+            async with controller.batch_slot():
+                await release.wait()
+
+        batches = [asyncio.create_task(run_batch()) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.batch_slot():
+                pass
+        release.set()
+        await asyncio.gather(*batches)
+        return rejected.value
+
+    assert asyncio.run(scenario()).status_code == 429
+    assert controller.batches == 0
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.services.batch import BatchContext
+
+
+def test_identical_work_runs_once():
+    calls = []
+
+    def search(query):
+        calls.append(query)
+        time.sleep(0.01)
+        return f"results for {query}"
+
+    async def scenario():
+        batch = BatchContext({"search": 2})
+        results = await asyncio.gather(*(batch.run("search", query, search, query) for query in ["a", "a", "b", "a"]))
+        return batch, results
+
+    batch, results = asyncio.run(scenario())
+    assert results == ["results for a", "results for a", "results for b", "results for a"]
+    assert sorted(calls) == ["a", "b"]
+    assert (batch.executed, batch.reused) == (2, 2)
+
+
+def test_same_key_in_different_stages_is_not_shared():
+    async def scenario():
+        batch = BatchContext({})
+        first = await batch.run("search", "q", lambda: "search")
+        second = await batch.run("fetch", "q", lambda: "fetch")
+        return batch, first, second
+
+    batch, first, second = asyncio.run(scenario())
+    assert (first, second) == ("search", "fetch")
+    assert batch.executed == 2
+
+
+def test_completed_work_is_reused():
+    calls = []
+
+    async def scenario():
+        batch = BatchContext({})
+        first = await batch.run("llm", "k", lambda: calls.append(1) or len(calls))
+        second = await batch.run("llm", "k", lambda: calls.append(1) or len(calls))
+        return first, second
+
+    assert asyncio.run(scenario()) == (1, 1)
+    assert len(calls) == 1
+
+
+def test_errors_are_shared_with_every_waiter():
+    def fail():
+        raise ValueError("boom")
+
+    async def scenario():
+        batch = BatchContext({})
+        return await asyncio.gather(batch.run("fetch", "url", fail), batch.run("fetch", "url", fail),
+                                    return_exceptions=True)
+
+    outcomes = asyncio.run(scenario())
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+
+
+def test_stage_limit_bounds_concurrency():
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def fetch(url):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return url
+
+    async def scenario():
+        batch = BatchContext({"fetch": 2})
+        return await asyncio.gather(*(batch.run("fetch", i, fetch, i) for i in range(6)))
+
+    assert asyncio.run(scenario()) == list(range(6))
+    assert peak == 2
+
+
+def test_cancelled_waiter_does_not_cancel_shared_work():
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        batch = BatchContext({})
+        first = asyncio.create_task(batch.run("llm", "k", slow))
+        second = asyncio.create_task(batch.run("llm", "k", slow))
+        await asyncio.to_thread(started.wait)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
@@ -0,0 +1,165 @@
+import pytest
+from app.models.schemas import QueryResponse, Source, ThoughtProcess
+from app.services.cache import (Cache, CacheBackend, MemoryCache, RedisCache, SQLiteCache,
+                                create_cache_backend, dumps, loads)
+
+
+class FakeRedis:
+    """In-memory stand-in for a redis client: get/set/delete with expiry seconds"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.data = {}
+
+    def get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= self.clock():
+            del self.data[key]
+            return None
+        return value
+
+    def set(self, key, value, ex=None):
+        self.data[key] = (value, self.clock() + ex if ex else None)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class FailingBackend(CacheBackend):
+    def get(self, key):
+        raise ConnectionError("backend down")
+
+    def set(self, key, value, ttl=None):
+        raise ConnectionError("backend down")
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, clock, tmp_path):
+    if request.param == "memory":
+        return MemoryCache(clock=clock)
+    if request.param == "sqlite":
+        return SQLiteCache(str(tmp_path / "cache.db"), clock=clock)
+    return RedisCache(client=FakeRedis(clock))
+
+
+def sample_response() -> QueryResponse:
+    return QueryResponse(
+        thought_process=ThoughtProcess(
+            sub_questions=["What is a qubit?"],
+            search_results={"What is a qubit?": [{"title": "Qubits", "link": "https://example.com/q",
+                                                  "snippet": "A qubit...", "displayLink": "example.com"}]},
+            analysis_steps=["1. Initial Query Analysis"],
+            content_summary={"What is a qubit?": "A qubit is a two-level quantum system."}
+        ),
+        answer="Qubits hold superpositions of 0 and 1 [1].",
+        sources=[Source(title="Qubits", url="https://example.com/q")]
+    )
+
+
+def test_backend_get_set_delete(backend):
+    assert backend.get("k") is None
+    backend.set("k", b"value")
+    assert backend.get("k") == b"value"
+    backend.set("k", b"newer")
+    assert backend.get("k") == b"newer"
+    backend.delete("k")
+    assert backend.get("k") is None
+
+
+def test_backend_expires_entries(backend, clock):
+    backend.set("short", b"1", ttl=10)
+    backend.set("forever", b"2")
+    clock.advance(9)
+    assert backend.get("short") == b"1"
+    clock.advance(2)
+    assert backend.get("short") is None
+    assert backend.get("forever") == b"2"
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    assert cache.get("a") == b"1"  # "b" is now the least recently used
+    cache.set("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.get("c") == b"3"
+
+
+def test_sqlite_cache_is_shared_through_the_file(tmp_path, clock):
+    path = str(tmp_path / "shared.db")
+    SQLiteCache(path, clock=clock).set("k", b"value", ttl=60)
+    assert SQLiteCache(path, clock=clock).get("k") == b"value"
+
+
+def test_sqlite_cache_purges_expired_rows(tmp_path, clock):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), purge_every=2, clock=clock)
+    cache.set("old", b"1", ttl=1)
+    clock.advance(2)
+    cache.set("new", b"2")
+    assert cache._conn.execute("SELECT key FROM cache").fetchall() == [("new",)]
+
+
+def test_redis_cache_passes_whole_second_expiry(clock):
+    client = FakeRedis(clock)
+    cache = RedisCache(client=client)
+    cache.set("k", b"v", ttl=0.2)
+    assert client.data["k"] == (b"v", clock() + 1)
+
+
+def test_dumps_and_loads_round_trip_models_and_json():
+    response = sample_response()
+    restored = loads(dumps(response))
+    assert isinstance(restored, QueryResponse)
+    assert restored == response
+
+    assert loads(dumps({"results": [1, "two"], "ok": True})) == {"results": [1, "two"], "ok": True}
+
+
+def test_keys_are_isolated_by_namespace_version_and_prefix():
+    backend = MemoryCache()
+    search = Cache(backend, "search")
+    keys = {
+        search.key("quantum"),
+        Cache(backend, "page").key("quantum"),
+        Cache(backend, "search", version=2).key("quantum"),
+        Cache(backend, "search", prefix="other").key("quantum"),
+        search.key("qubits")
+    }
+    assert len(keys) == 5
+    assert search.key("quantum").startswith("research:search:v1:")
+
+    search.set("quantum", ["result"])
+    assert Cache(backend, "search", version=2).get("quantum") is None
+    assert search.get("quantum") == ["result"]
+
+
+def test_cache_counts_hits_and_misses_and_applies_ttl(clock):
+    cache = Cache(MemoryCache(clock=clock), "response", ttl=60)
+    assert cache.get("q") is None
+    cache.set("q", sample_response())
+    assert cache.get("q") == sample_response()
+    clock.advance(61)
+    assert cache.get("q") is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_rate": 0.333}
+
+
+def test_failing_backend_counts_as_a_miss():
+    cache = Cache(FailingBackend(), "search")
+    cache.set("q", ["result"])  # Swallowed and logged
+    assert cache.get("q") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_create_cache_backend_from_env(monkeypatch, tmp_path):
+    monkeypatch.delenv("CACHE_BACKEND", raising=False)
+    assert isinstance(create_cache_backend(), MemoryCache)
+
+    monkeypatch.setenv("CACHE_BACKEND", "sqlite")
+    monkeypatch.setenv("CACHE_URL", str(tmp_path / "cache.db"))
+    assert isinstance(create_cache_backend(), SQLiteCache)
+
+    monkeypatch.setenv("CACHE_BACKEND", "memcached")
+    with pytest.raises(ValueError, match="Unknown CACHE_BACKEND"):
+        create_cache_backend()
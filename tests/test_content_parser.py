@@ -0,0 +1,65 @@
+import pytest
+
+pytest.importorskip("newspaper")
+pytest.importorskip("trafilatura")
+
+from app.services import content_parser
+from app.services.content_parser import ContentParser
+
+
+class FakeResponse:
+    def __init__(self, body: bytes, headers: dict):
+        self.body = body
+        self.headers = headers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+
+def serve(monkeypatch, body: bytes, headers: dict):
+    monkeypatch.setattr(content_parser.requests, "get", lambda *args, **kwargs: FakeResponse(body, headers))
+
+
+@pytest.mark.parametrize("body, headers, reason", [
+    (b"%PDF-1.7 ...", {"Content-Type": "application/pdf"}, "non-text content"),
+    (b"<html></html>", {"Content-Type": "text/html", "Content-Length": str(10 ** 9)}, "oversized content"),
+    (b"%PDF-1.7 ...", {}, "binary content"),
+])
+def test_skipped_content_is_not_a_domain_failure(monkeypatch, body, headers, reason):
+    serve(monkeypatch, body, headers)
+    parser = ContentParser()
+    assert parser._download("https://arxiv.org/pdf/1234") == (None, reason)
+
+    for i in range(5):
+        assert parser.fetch_and_extract(f"https://arxiv.org/pdf/{i}") == ("", False)
+    assert parser.health.snapshot("arxiv.org")["fetches"] == 0
+    assert parser.health.allow("https://arxiv.org/abs/1234")
+
+
+def test_failed_download_is_a_domain_failure(monkeypatch):
+    def fail(*args, **kwargs):
+        raise ConnectionError("refused")
+
+    monkeypatch.setattr(content_parser.requests, "get", fail)
+    parser = ContentParser()
+    assert parser._download("https://down.com/") == (None, None)
+    assert parser.fetch_and_extract("https://down.com/") == ("", False)
+    assert parser.health.snapshot("down.com")["success_rate"] == 0.0
+
+
+def test_download_is_capped(monkeypatch):
+    serve(monkeypatch, b"<html>" + b"x" * 5000 + b"</html>", {"Content-Type": "text/html; charset=utf-8"})
+    parser = ContentParser(max_download_bytes=1024, chunk_size=256)
+    body, skip_reason = parser._download("https://big.com/")
+    assert skip_reason is None
+    assert len(body) == 1024
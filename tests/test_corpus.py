@@ -0,0 +1,98 @@
+import time
+import pytest
+from app.services.corpus import ResearchCorpus
+
+DOCUMENTS = [
+    ("https://cars.com/ev-safety", "Electric car safety ratings",
+     "Electric car safety has improved. Crash tests show electric car batteries are safe. "
+     "Safety ratings for every electric car model."),
+    ("https://medical.com/scar", "Scar tissue healing",
+     "A scar forms after injury. Scar tissue safety during surgery and electric stimulation therapy for scar healing."),
+    ("https://cars.com/ev-fires", "Battery fires in EVs",
+     "Electric vehicles rarely catch fire; car makers test battery safety extensively."),
+    ("https://food.com/pasta", "Cooking pasta", "Boil water, add salt and pasta. Cook for ten minutes."),
+    ("https://code.com/python", "Python tutorial", "Learn Python programming with examples and exercises.")
+]
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    corpus = ResearchCorpus(str(tmp_path / "corpus.db"))
+    for url, title, content in DOCUMENTS:
+        corpus.add(url, title, content)
+    yield corpus
+    corpus.close()
+
+
+def test_coverage_counts_whole_tokens_not_substrings(corpus):
+    corpus.min_score = 0.0
+    corpus.min_coverage = 1.0
+    # The scar page contains "tissue" and the substring "car" (in "scar"), but not the token "car"
+    assert [hit["url"] for hit in corpus.lookup("car tissue", limit=5)] == []
+    assert [hit["url"] for hit in corpus.lookup("scar tissue", limit=5)] == ["https://medical.com/scar"]
+
+
+def test_scores_are_normalized_per_query(corpus):
+    corpus.min_score = 0.0
+    corpus.min_coverage = 0.0
+    scores = {hit["url"]: hit["score"] for hit in corpus.lookup("electric car safety", limit=5)}
+    assert scores == {
+        "https://cars.com/ev-safety": pytest.approx(0.752, abs=0.01),
+        "https://cars.com/ev-fires": pytest.approx(0.466, abs=0.01),
+        "https://medical.com/scar": 0.0
+    }
+
+
+def test_min_score_drops_weak_matches(corpus):
+    hits = corpus.lookup("electric car safety", limit=5)
+    assert [hit["url"] for hit in hits] == ["https://cars.com/ev-safety", "https://cars.com/ev-fires"]
+
+    corpus.min_score = 0.6
+    assert [hit["url"] for hit in corpus.lookup("electric car safety", limit=5)] == ["https://cars.com/ev-safety"]
+
+
+def test_questions_without_matching_terms_find_nothing(corpus):
+    assert corpus.lookup("How does quantum computing work?") == []
+    assert corpus.lookup("what is it?") == []  # Only stopwords
+
+
+def test_stale_documents_are_not_served(corpus):
+    corpus.add("https://cars.com/old-ev-safety", "Electric car safety in 1990",
+               "Electric car safety electric car safety", fetched_at=time.time() - 8 * 24 * 3600)
+    urls = [hit["url"] for hit in corpus.lookup("electric car safety", limit=5)]
+    assert "https://cars.com/old-ev-safety" not in urls
+
+    corpus.max_age = 30 * 24 * 3600
+    urls = [hit["url"] for hit in corpus.lookup("electric car safety", limit=5)]
+    assert "https://cars.com/old-ev-safety" in urls
+
+
+def test_add_refreshes_an_existing_document(corpus):
+    corpus.add("https://food.com/pasta", "Pasta safety", "Electric pasta cooker car safety guide")
+    assert corpus.stats()["documents"] == len(DOCUMENTS)
+    corpus.min_score = 0.0
+    assert "https://food.com/pasta" in [hit["url"] for hit in corpus.lookup("electric car safety", limit=5)]
+
+
+def test_bulk_ingest_skips_records_without_url_or_content(corpus):
+    records = [
+        {"url": "https://a.com/1", "title": "One", "content": "first document"},
+        {"url": "https://a.com/2", "content": "untitled document"},
+        {"url": "", "content": "no url"},
+        {"url": "https://a.com/3", "content": ""},
+        {"title": "neither"}
+    ]
+    assert corpus.bulk_ingest(records, batch_size=2) == 2
+    assert corpus.stats()["documents"] == len(DOCUMENTS) + 2
+
+
+def test_compact_removes_stale_rows(corpus):
+    corpus.add("https://old.com/a", "Old", "old electric content", fetched_at=time.time() - 10 * 24 * 3600)
+    corpus.add("https://old.com/b", "Older", "older electric content", fetched_at=time.time() - 20 * 24 * 3600)
+
+    assert corpus.compact(max_age=15 * 24 * 3600) == 1
+    assert corpus.compact() == 1  # Default max_age of 7 days
+    assert corpus.stats()["documents"] == len(DOCUMENTS)
+    corpus.min_score = 0.0
+    corpus.min_coverage = 0.0
+    assert not [hit for hit in corpus.lookup("old electric content", limit=10) if "old.com" in hit["url"]]
@@ -0,0 +1,96 @@
+from app.services.domain_health import DomainHealth, domain_of
+
+
+def test_domain_of_strips_www_and_case():
+    assert domain_of("https://WWW.Example.com/a?b=1") == "example.com"
+    assert domain_of("not a url") == ""
+
+
+def test_circuit_opens_after_consecutive_failures(clock):
+    health = DomainHealth(failure_threshold=3, cooldown=60, clock=clock)
+    url = "https://flaky.com/page"
+    for _ in range(2):
+        health.record(url, False, 1.0)
+        assert health.allow(url)
+
+    health.record(url, False, 1.0)
+    assert not health.allow(url)
+    assert health.score(url) == 0.0
+    assert health.snapshot("flaky.com")["skipped"] == 1
+
+
+def test_half_open_allows_a_single_trial(clock):
+    health = DomainHealth(failure_threshold=1, cooldown=60, clock=clock)
+    url = "https://flaky.com/page"
+    health.record(url, False, 1.0)
+
+    clock.advance(61)
+    assert health.allow(url)  # Trial request
+    assert not health.allow(url)  # Others wait for the trial's outcome
+
+
+def test_successful_trial_closes_circuit(clock):
+    health = DomainHealth(failure_threshold=1, cooldown=60, clock=clock)
+    url = "https://flaky.com/page"
+    health.record(url, False, 1.0)
+    clock.advance(61)
+    assert health.allow(url)
+
+    health.record(url, True, 0.5, 1200)
+    assert health.allow(url)
+    assert health.allow(url)
+    assert not health.snapshot("flaky.com")["circuit_open"]
+
+
+def test_failed_trial_reopens_circuit(clock):
+    health = DomainHealth(failure_threshold=1, cooldown=60, clock=clock)
+    url = "https://flaky.com/page"
+    health.record(url, False, 1.0)
+    clock.advance(61)
+    assert health.allow(url)
+
+    health.record(url, False, 1.0)
+    assert not health.allow(url)
+    clock.advance(30)
+    assert not health.allow(url)
+    clock.advance(31)
+    assert health.allow(url)
+
+
+def test_low_success_rate_opens_circuit(clock):
+    health = DomainHealth(failure_threshold=10, min_success_rate=0.5, min_samples=4, cooldown=60, clock=clock)
+    url = "https://mostly-down.com/"
+    for success in (True, False, True, False):
+        health.record(url, success, 1.0)
+    assert health.allow(url)
+
+    health.record(url, False, 1.0)  # 2 of 5 succeeded
+    assert not health.allow(url)
+
+
+def test_prioritizes_and_reports_unhealthy_domains_first(clock):
+    health = DomainHealth(failure_threshold=1, cooldown=60, clock=clock)
+    health.record("https://good.com/a", True, 0.2, 500)
+    health.record("https://bad.com/a", False, 3.0)
+
+    assert health.score("https://unknown.com/") == 1.0
+    assert health.score("https://good.com/b") > health.score("https://bad.com/b")
+    worst = health.worst()
+    assert [row["domain"] for row in worst] == ["bad.com", "good.com"]
+    assert worst[0]["circuit_open"] and worst[0]["retry_in"] == 60
+    assert worst[1]["avg_extracted_chars"] == 500
+
+
+def test_release_ends_trial_without_an_outcome(clock):
+    health = DomainHealth(failure_threshold=1, cooldown=60, clock=clock)
+    url = "https://arxiv.org/pdf/1234"
+    health.record(url, False, 1.0)
+    clock.advance(61)
+    assert health.allow(url)
+
+    health.release(url)
+    assert health.allow(url)  # Another trial may go through
+    assert health.snapshot("arxiv.org")["fetches"] == 1
+
+    health.release("https://never-seen.com/")  # Unknown domains are ignored
+    assert health.snapshot("never-seen.com") is None
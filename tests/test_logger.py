@@ -0,0 +1,22 @@
+import pytest
+from app.utils.logger import make_request_id
+
+
+@pytest.mark.parametrize("supplied", ["abc123", "req-2024.10_19", "A" * 64])
+def test_safe_request_ids_are_kept(supplied):
+    assert make_request_id(supplied) == supplied
+
+
+@pytest.mark.parametrize("supplied", [
+    None,
+    "",
+    "abc\r\n2026-10-19 — ai_research_assistant — ERROR — [x] forged line",
+    "abc\n",
+    "has space",
+    "quote\"d",
+    "A" * 65
+])
+def test_unsafe_request_ids_are_replaced(supplied):
+    request_id = make_request_id(supplied)
+    assert request_id != supplied
+    assert len(request_id) == 32 and request_id.isalnum()
@@ -0,0 +1,145 @@
+import json
+import types
+import httpx
+import pytest
+from openai import APITimeoutError, RateLimitError
+from app.services.model_router import DEFAULT_ROUTES, ModelRouter, StageRoute, load_routes
+
+REQUEST = httpx.Request("POST", "http://fake/v1/chat/completions")
+
+
+def rate_limited() -> RateLimitError:
+    return RateLimitError("rate limited", response=httpx.Response(429, request=REQUEST), body=None)
+
+
+class FakeCompletions:
+    """Answers per model after a simulated latency, or raises the model's configured error"""
+
+    def __init__(self, clock, latencies, errors):
+        self.clock = clock
+        self.latencies = latencies
+        self.errors = errors
+        self.calls = []
+
+    def create(self, model, messages, temperature, max_tokens):
+        self.calls.append({"model": model, "temperature": temperature, "max_tokens": max_tokens})
+        self.clock.advance(self.latencies.get(model, 0.5))
+        if model in self.errors:
+            raise self.errors[model]
+        return types.SimpleNamespace(
+            choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=f"answer from {model}"))],
+            usage=types.SimpleNamespace(prompt_tokens=12, completion_tokens=30)
+        )
+
+
+class FakeClient:
+    def __init__(self, clock, latencies=None, errors=None):
+        self.completions = FakeCompletions(clock, latencies or {}, errors or {})
+        self.chat = types.SimpleNamespace(completions=self.completions)
+        self.options = None
+
+    def with_options(self, **options):
+        self.options = options
+        return self
+
+
+ROUTES = {
+    "summary": StageRoute(model="primary", fallbacks=("backup",), max_tokens=100, temperature=0.5,
+                          latency_budget=2, timeout=5)
+}
+MESSAGES = [{"role": "user", "content": "question"}]
+
+
+def make_router(clock, **client_kwargs):
+    client = FakeClient(clock, **client_kwargs)
+    router = ModelRouter(client, routes=ROUTES, rate_limit_cooldown=30, min_samples=3,
+                         latency_horizon=100, clock=clock)
+    return router, client
+
+
+def answer(response) -> str:
+    return response.choices[0].message.content
+
+
+def test_calls_with_stage_timeout_and_route_defaults(clock):
+    router, client = make_router(clock)
+    assert answer(router.complete("summary", MESSAGES)) == "answer from primary"
+    assert client.options == {"timeout": 5, "max_retries": 0}
+    assert client.completions.calls == [{"model": "primary", "temperature": 0.5, "max_tokens": 100}]
+
+    router.complete("summary", MESSAGES, max_tokens=40, temperature=0)
+    assert client.completions.calls[-1] == {"model": "primary", "temperature": 0, "max_tokens": 40}
+
+
+def test_falls_back_on_rate_limit_and_cools_down(clock):
+    router, client = make_router(clock, errors={"primary": rate_limited()})
+    assert answer(router.complete("summary", MESSAGES)) == "answer from backup"
+    assert router.candidates("summary") == ["backup", "primary"]
+
+    clock.advance(31)
+    assert router.candidates("summary") == ["primary", "backup"]
+
+
+def test_falls_back_on_timeout_and_counts_it_as_a_sample(clock):
+    router, client = make_router(clock, latencies={"primary": 5},
+                                 errors={"primary": APITimeoutError(request=REQUEST)})
+    assert answer(router.complete("summary", MESSAGES)) == "answer from backup"
+    stats = {row["model"]: row for row in router.stats()}
+    assert stats["primary"]["failures"] == 1
+    assert stats["primary"]["calls"] == 0
+    assert stats["primary"]["latency_p95"] == 5
+
+
+def test_raises_last_error_when_every_model_fails(clock):
+    router, _ = make_router(clock, errors={"primary": rate_limited(), "backup": rate_limited()})
+    with pytest.raises(RateLimitError):
+        router.complete("summary", MESSAGES)
+
+
+def test_slow_primary_is_demoted_until_samples_age_out(clock):
+    router, client = make_router(clock, latencies={"primary": 3, "backup": 1})
+    for _ in range(3):
+        assert answer(router.complete("summary", MESSAGES)) == "answer from primary"
+
+    # p95 of 3s is over the 2s budget: the fallback goes first
+    assert router.candidates("summary") == ["backup", "primary"]
+    assert answer(router.complete("summary", MESSAGES)) == "answer from backup"
+
+    clock.advance(101)
+    assert router.candidates("summary") == ["primary", "backup"]
+
+
+def test_records_latency_and_token_usage_per_stage_and_model(clock):
+    router, _ = make_router(clock, latencies={"primary": 1})
+    router.complete("summary", MESSAGES)
+    router.complete("summary", MESSAGES)
+
+    assert router.stats() == [{
+        "stage": "summary",
+        "model": "primary",
+        "calls": 2,
+        "failures": 0,
+        "latency_p50": 1,
+        "latency_p95": 1,
+        "avg_prompt_tokens": 12,
+        "avg_completion_tokens": 30
+    }]
+
+
+def test_default_timeouts_leave_room_above_latency_budgets():
+    for route in DEFAULT_ROUTES.values():
+        assert route.timeout > route.latency_budget
+
+
+def test_load_routes_applies_overrides(monkeypatch, tmp_path):
+    monkeypatch.setenv("MODEL_ROUTES", json.dumps({"summary": {"model": "gpt-4o", "fallbacks": ["gpt-4o-mini"]}}))
+    routes = load_routes()
+    assert routes["summary"].model == "gpt-4o"
+    assert routes["summary"].fallbacks == ("gpt-4o-mini",)
+    assert routes["summary"].timeout == DEFAULT_ROUTES["summary"].timeout
+    assert routes["analysis"] == DEFAULT_ROUTES["analysis"]
+
+    config = tmp_path / "routes.json"
+    config.write_text(json.dumps({"analysis": {"max_tokens": 80}}))
+    monkeypatch.setenv("MODEL_ROUTES", str(config))
+    assert load_routes()["analysis"].max_tokens == 80
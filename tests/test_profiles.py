@@ -0,0 +1,59 @@
+import random
+import pytest
+from app.services.model_router import CHAT_OVERHEAD_TOKENS, CONTEXT_WINDOWS, DEFAULT_ROUTES, ModelRouter
+from app.services.profiles import PROFILES, get_profile
+
+
+def summary_tokens(mode: str) -> int:
+    return min(get_profile(mode).summary_max_tokens, DEFAULT_ROUTES["summary"].max_tokens)
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError, match="Unknown research mode"):
+        get_profile("exhaustive")
+
+
+@pytest.mark.parametrize("mode", list(PROFILES))
+def test_summary_prompt_and_answer_fit_the_context_window(mode):
+    router = ModelRouter(client=None, routes=DEFAULT_ROUTES)
+    assert router.context_window("summary") == CONTEXT_WINDOWS["gpt-4"]
+
+    budget = router.prompt_budget("summary", summary_tokens(mode))
+    assert budget + summary_tokens(mode) + CHAT_OVERHEAD_TOKENS <= CONTEXT_WINDOWS["gpt-4"]
+    assert budget >= 2000  # Still room for a useful amount of source content
+
+
+def test_deep_mode_summary_with_all_sources_fits_gpt4():
+    pytest.importorskip("newspaper")
+    pytest.importorskip("trafilatura")
+    pytest.importorskip("googleapiclient")
+    tiktoken = pytest.importorskip("tiktoken")
+    from app.services.agent import ResearchAgent
+
+    try:
+        encoding = tiktoken.encoding_for_model("gpt-4")
+    except Exception as e:  # The encoding is downloaded on first use
+        pytest.skip(f"tiktoken encoding unavailable: {e}")
+
+    agent = ResearchAgent.__new__(ResearchAgent)
+    agent.encoding = encoding
+    agent.max_tokens = 7000
+    agent.router = ModelRouter(client=None, routes=DEFAULT_ROUTES)
+
+    profile = get_profile("deep")
+    words = ["quantum", "qubit", "entanglement", "superposition", "error", "correction", "hardware", "algorithm"]
+    rng = random.Random(0)
+    sources = [{"title": f"Source {i}", "url": f"https://example{i}.com/article"} for i in range(profile.max_total_sources)]
+    results = [
+        {"question": "How do quantum computers correct errors?",
+         "content": " ".join(rng.choice(words) for _ in range(600))[:3000]}
+        for _ in sources
+    ]
+
+    tokens = summary_tokens("deep")
+    sources_text, content_text = agent._prepare_summary_content(results, sources, "Explain quantum computing", tokens)
+    messages = agent._summary_messages("Explain quantum computing", sources_text, content_text, tokens)
+    prompt_tokens = sum(len(encoding.encode(message["content"])) for message in messages)
+
+    assert content_text
+    assert prompt_tokens + tokens + CHAT_OVERHEAD_TOKENS <= CONTEXT_WINDOWS["gpt-4"]
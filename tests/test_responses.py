@@ -0,0 +1,112 @@
+import gzip
+import json
+import pytest
+from starlette.requests import Request
+from app.models.schemas import BatchQueryResponse, BatchQueryResult, QueryResponse, Source, ThoughtProcess
+from app.utils.responses import COMPRESSION_THRESHOLD, batch_include, build_include, lean_json_response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def make_request(accept_encoding: str = "") -> Request:
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+    return Request({"type": "http", "method": "POST", "path": "/api/ask", "headers": headers})
+
+
+def make_response(answer: str = "Qubits hold superpositions [1].") -> QueryResponse:
+    return QueryResponse(
+        thought_process=ThoughtProcess(
+            sub_questions=["What is a qubit?"],
+            search_results={"What is a qubit?": [{"title": "Qubits", "link": "https://example.com/q"}]},
+            analysis_steps=["1. Initial Query Analysis"],
+            content_summary={}
+        ),
+        answer=answer,
+        sources=[Source(title="Qubits", url="https://example.com/q")]
+    )
+
+
+def test_no_fields_includes_everything():
+    assert build_include(None, QueryResponse) is None
+    assert build_include([], QueryResponse) is None
+
+
+def test_nested_paths_build_an_include_tree():
+    include = build_include(["answer", "thought_process.sub_questions", "thought_process.analysis_steps"], QueryResponse)
+    assert include == {"answer": True, "thought_process": {"sub_questions": True, "analysis_steps": True}}
+
+    dumped = json.loads(make_response().model_dump_json(include=include))
+    assert dumped == {"answer": "Qubits hold superpositions [1].",
+                      "thought_process": {"sub_questions": ["What is a qubit?"],
+                                          "analysis_steps": ["1. Initial Query Analysis"]}}
+
+
+@pytest.mark.parametrize("fields", [
+    ["thought_process", "thought_process.sub_questions"],
+    ["thought_process.sub_questions", "thought_process"]
+])
+def test_parent_path_includes_its_children(fields):
+    assert build_include(fields, QueryResponse) == {"thought_process": True}
+
+
+@pytest.mark.parametrize("path", ["sources.title", "answers", "thought_process.unknown", "answer.length"])
+def test_unknown_paths_are_rejected(path):
+    # The endpoints turn this ValueError into a 400 response
+    with pytest.raises(ValueError, match="Unknown response field"):
+        build_include([path], QueryResponse)
+
+
+def test_batch_include_applies_to_every_result():
+    assert batch_include(None) is None
+    batch = BatchQueryResponse(results=[
+        BatchQueryResult(query="q1", response=make_response()),
+        BatchQueryResult(query="q2", error="Query rejected")
+    ])
+    include = batch_include(build_include(["answer"], QueryResponse))
+    assert json.loads(batch.model_dump_json(include=include)) == {"results": [
+        {"query": "q1", "response": {"answer": "Qubits hold superpositions [1]."}, "error": None},
+        {"query": "q2", "response": None, "error": "Query rejected"}
+    ]}
+
+
+def test_small_bodies_are_not_compressed():
+    response = lean_json_response(make_response(), make_request("gzip, br"))
+    assert len(response.body) < COMPRESSION_THRESHOLD
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["content-type"] == "application/json"
+    assert json.loads(response.body) == make_response().model_dump(mode="json")
+
+
+def test_large_bodies_are_gzipped_when_accepted():
+    model = make_response("x" * COMPRESSION_THRESHOLD)
+    response = lean_json_response(model, make_request("gzip"))
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert json.loads(gzip.decompress(response.body)) == model.model_dump(mode="json")
+
+
+def test_compression_starts_exactly_at_the_threshold():
+    overhead = len(make_response("").model_dump_json())
+    below = lean_json_response(make_response("x" * (COMPRESSION_THRESHOLD - overhead - 1)), make_request("gzip"))
+    at = lean_json_response(make_response("x" * (COMPRESSION_THRESHOLD - overhead)), make_request("gzip"))
+    assert "content-encoding" not in below.headers
+    assert at.headers["content-encoding"] == "gzip"
+
+
+def test_large_bodies_are_sent_as_is_without_accept_encoding():
+    model = make_response("x" * COMPRESSION_THRESHOLD)
+    response = lean_json_response(model, make_request())
+    assert "content-encoding" not in response.headers
+    assert json.loads(response.body)["answer"] == model.answer
+
+
+@pytest.mark.skipif(brotli is None, reason="brotli is not installed")
+def test_brotli_is_preferred_when_available():
+    model = make_response("x" * COMPRESSION_THRESHOLD)
+    response = lean_json_response(model, make_request("gzip, br;q=1.0"))
+    assert response.headers["content-encoding"] == "br"
+    assert json.loads(brotli.decompress(response.body))["answer"] == model.answer